@@ -1,6 +1,13 @@
 import sys
 import json
-from typing import Dict, Any, Optional
+import hashlib
+import logging
+import orjson
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
 
 # Add project root to sys.path to allow importing from sibling directories
 # Adjust based on actual project structure if necessary
@@ -8,21 +15,45 @@ project_root = '../../'
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+# Pre-built error responses returned instead of generated TSX
+_ERR_NO_DATA = '<p class="text-red-500">Error: No research data received.</p>'
+_ERR_IMPORT = '<p class="text-red-500">Error: Dashboard code generation logic failed to load.</p>'
+_ERR_BAD_JSON = '<p class="text-red-500">Error: Could not parse research data.</p>'
+_ERR_TEMPLATE = '<p class="text-red-500">Error: Failed during TSX generation process. Type: {t}</p>'
+# Error paragraphs start with one of these (ours use `class`, the tool's ESLint/LLM failures `className`)
+_ERROR_PREFIXES = ('<p class="text-red-500">', '<p className="text-red-500">')
+
 # Import the UNDECORATED tool logic function
 try:
     # Use relative import if possible, otherwise rely on sys.path
     # Import the logic function directly, aliasing it for use here
     from .tools import _generate_news_display_code_logic as generate_news_display_code_func
-    print("DEBUG (dashboard_agent.agent): Imported _generate_news_display_code_logic successfully.", file=sys.stderr)
+    from .tools import stream_news_display_code as stream_news_display_code_func, VALIDATE_TSX
+    logger.debug("Imported _generate_news_display_code_logic successfully.")
 except ImportError as e:
-    print(f"ERROR (dashboard_agent.agent): Failed to import tool logic function: {e}. Check path and tool definition.", file=sys.stderr)
+    logger.error(f"Failed to import tool logic function: {e}. Check path and tool definition.")
     # Define a fallback if import fails
-    def generate_news_display_code_func(research_data_json: str) -> str:
-        print("ERROR (dashboard_agent.agent): Fallback tool logic called.", file=sys.stderr)
-        return '<p class="text-red-500">Error: Dashboard code generation logic failed to load.</p>'
+    def generate_news_display_code_func(research_data: Any) -> str:
+        logger.error("Fallback tool logic called.")
+        return _ERR_IMPORT
+    def stream_news_display_code_func(research_data: Any) -> Iterator[str]:
+        logger.error("Fallback tool logic called.")
+        yield _ERR_IMPORT
+    VALIDATE_TSX = False
 
 # --- Core Logic for TSX Generation ---
 
+# Bounded LRU cache of generated TSX keyed by a digest of the research JSON,
+# so re-runs with identical input skip regeneration (including ESLint/LLM calls).
+# Only successful output is stored; error results are regenerated on the next call.
+TSX_CACHE_MAX_SIZE = 64
+_tsx_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_tsx_cache_lock = threading.Lock() # Generations may run concurrently in worker threads (see run_pipeline.py)
+
+def _research_json_digest(research_json_str: str) -> bytes:
+    """Returns a short blake2b digest of the research JSON, used as the TSX cache key."""
+    return hashlib.blake2b(research_json_str.encode('utf-8'), digest_size=16).digest()
+
 def run_tsx_generation(research_json_str: str) -> str:
     """
     Takes research JSON string, uses the tool to generate TSX for news display.
@@ -34,25 +65,67 @@ def run_tsx_generation(research_json_str: str) -> str:
         A string containing the generated TSX code for the news section,
         or an error message string.
     """
-    print("DEBUG (dashboard_agent.agent): Entering run_tsx_generation.", file=sys.stderr)
+    logger.debug("Entering run_tsx_generation.")
     if not research_json_str:
-        print("ERROR (dashboard_agent.agent): Received empty research_json_str.", file=sys.stderr)
-        return '<p class="text-red-500">Error: No research data received.</p>'
+        logger.error("Received empty research_json_str.")
+        return _ERR_NO_DATA
+
+    cache_key = _research_json_digest(research_json_str)
+    with _tsx_cache_lock:
+        cached_tsx = _tsx_cache.get(cache_key)
+        if cached_tsx is not None:
+            _tsx_cache.move_to_end(cache_key)
+    if cached_tsx is not None:
+        logger.debug("Returning cached TSX for identical research JSON.")
+        return cached_tsx
+
+    # Reject malformed JSON at parse speed and hand the parsed object on, so it is parsed only once
+    try:
+        research_data = orjson.loads(research_json_str)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Research JSON is malformed: {e}")
+        return _ERR_BAD_JSON
 
     try:
         # Directly call the imported logic function
-        tsx_output = generate_news_display_code_func(research_data_json=research_json_str)
-        print("DEBUG (dashboard_agent.agent): Tool logic function _generate_news_display_code_logic returned.", file=sys.stderr)
+        tsx_output = generate_news_display_code_func(research_data=research_data)
+        logger.debug("Tool logic function _generate_news_display_code_logic returned.")
+        if tsx_output.startswith(_ERROR_PREFIXES):
+            return tsx_output # Possibly transient (ESLint/LLM hiccup), so the next call retries instead
+        with _tsx_cache_lock:
+            _tsx_cache[cache_key] = tsx_output
+            if len(_tsx_cache) > TSX_CACHE_MAX_SIZE:
+                _tsx_cache.popitem(last=False) # Evict least recently used entry
         return tsx_output
     except Exception as e:
-        print(f"ERROR (dashboard_agent.agent): Unexpected error calling tool: {e}", file=sys.stderr)
-        return f'<p class="text-red-500">Error: Failed during TSX generation process. Type: {type(e).__name__}</p>'
+        logger.error(f"Unexpected error calling tool: {e}")
+        return _ERR_TEMPLATE.format(t=type(e).__name__)
+
+def stream_tsx_generation(research_json_str: str) -> Iterator[str]:
+    """
+    Like run_tsx_generation, but yields the TSX in fragments so callers can write it
+    straight to a file instead of holding the whole grid in memory.
+    When ESLint validation is enabled the fragment must be validated as a whole,
+    so the (possibly cached) result of run_tsx_generation is yielded in one piece.
+    Otherwise the in-memory TSX cache is bypassed: fragments are regenerated on every
+    call and never stored, since caching them would mean holding the whole grid again.
+    """
+    if VALIDATE_TSX or not research_json_str:
+        yield run_tsx_generation(research_json_str)
+        return
+    try:
+        research_data = orjson.loads(research_json_str)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Research JSON is malformed: {e}")
+        yield _ERR_BAD_JSON
+        return
+    yield from stream_news_display_code_func(research_data)
 
 # --- Main execution (if script is called directly) ---
 # This part is likely NOT used when called by run_pipeline.py,
 # but can be useful for direct testing.
 if __name__ == "__main__":
-    print("DEBUG (dashboard_agent.agent): Script called directly.", file=sys.stderr)
+    logger.debug("Script called directly.")
     # Example: Read JSON from a file or stdin for testing
     example_json = """
     {
@@ -87,9 +160,9 @@ if __name__ == "__main__":
     """
     if len(sys.argv) > 1:
          input_json_str = sys.argv[1]
-         print("DEBUG (dashboard_agent.agent): Received JSON string via argv.", file=sys.stderr)
+         logger.debug("Received JSON string via argv.")
     else:
-         print("DEBUG (dashboard_agent.agent): Using example JSON for testing.", file=sys.stderr)
+         logger.debug("Using example JSON for testing.")
          input_json_str = example_json
 
     generated_tsx = run_tsx_generation(input_json_str)
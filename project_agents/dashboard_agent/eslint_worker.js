@@ -0,0 +1,31 @@
+// Long-lived ESLint worker used by dashboard_agent/tools.py.
+// Started once with cwd set to the dashboard directory, so ESLint is loaded (and Node/V8 booted)
+// a single time instead of once per validation attempt.
+//
+// Protocol: one JSON request per line on stdin: {"code": "...", "filePath": "temp/lint_check.tsx"}
+// One JSON reply per line on stdout: the ESLint results array (same shape as `eslint --format json`),
+// or {"error": "..."} if linting the request failed.
+const path = require('path');
+const readline = require('readline');
+const { createRequire } = require('module');
+
+const configFile = process.argv[2];
+// Resolve 'eslint' from the dashboard's node_modules rather than from this script's location
+const requireFromCwd = createRequire(path.join(process.cwd(), 'package.json'));
+const { ESLint } = requireFromCwd('eslint');
+const eslint = new ESLint({ cwd: process.cwd(), overrideConfigFile: configFile, fix: true });
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+let queue = Promise.resolve(); // Serialize requests so replies stay in request order
+rl.on('line', (line) => {
+  queue = queue.then(async () => {
+    let reply;
+    try {
+      const { code, filePath } = JSON.parse(line);
+      reply = await eslint.lintText(code, { filePath });
+    } catch (err) {
+      reply = { error: String((err && err.stack) || err) };
+    }
+    process.stdout.write(JSON.stringify(reply) + '\n');
+  });
+});
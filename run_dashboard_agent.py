@@ -1,17 +1,44 @@
 import asyncio
 import json
 import os
-from typing import Optional
+from typing import Iterator
 
 # Import the runner function from the dashboard agent
 try:
-    from project_agents.dashboard_agent.agent import run_generation
-    print("DEBUG: Successfully imported run_generation from project_agents.dashboard_agent.agent")
+    from project_agents.dashboard_agent.agent import stream_tsx_generation
+    print("DEBUG: Successfully imported stream_tsx_generation from project_agents.dashboard_agent.agent")
 except ImportError as e:
-    print(f"ERROR: Failed to import run_generation: {e}")
-    async def run_generation(json_str: str) -> Optional[str]: # Fallback
-        print("ERROR: run_generation fallback executed due to import error.")
-        return None
+    print(f"ERROR: Failed to import stream_tsx_generation: {e}")
+    def stream_tsx_generation(json_str: str) -> Iterator[str]: # Fallback
+        print("ERROR: stream_tsx_generation fallback executed due to import error.")
+        return iter(())
+
+def write_tsx(output_tsx_path: str, fragments: Iterator[str]) -> bool:
+    """
+    Writes generated TSX fragments to a temp file next to the output as they are produced,
+    then moves it into place once generation has finished. If generation raises, the temp
+    file is removed and the existing component is left untouched, so a half-written file
+    never breaks the Next.js build.
+    Returns False (without creating the file) if nothing was generated.
+    """
+    first_fragment = next(fragments, None)
+    if first_fragment is None:
+        return False
+    # Ensure the output directory exists
+    os.makedirs(os.path.dirname(output_tsx_path), exist_ok=True)
+    temp_path = f"{output_tsx_path}.{os.getpid()}.tmp" # Same directory, so os.replace is atomic
+    try:
+        with open(temp_path, "w") as f:
+            f.write(first_fragment)
+            f.writelines(fragments)
+        os.replace(temp_path, output_tsx_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return True
 
 async def main():
     """
@@ -32,21 +59,16 @@ async def main():
         print(f"ERROR: Failed to read {input_json_path}: {e}")
         return
 
-    # 2. Run the dashboard generator agent
-    generated_tsx_code = await run_generation(research_json_string)
+    # 2./3. Run the dashboard generator and stream the TSX straight into the output file
+    # (in a worker thread, so generation doesn't block the event loop)
+    try:
+        saved = await asyncio.to_thread(write_tsx, output_tsx_path, stream_tsx_generation(research_json_string))
+    except Exception as e:
+        print(f"\n--- ERROR: Failed to generate/save TSX code to {output_tsx_path}: {e} ---")
+        return
 
-    # 3. Save the generated TSX code
-    if generated_tsx_code:
-        try:
-            # Ensure the output directory exists
-            os.makedirs(os.path.dirname(output_tsx_path), exist_ok=True)
-            with open(output_tsx_path, "w") as f:
-                f.write(generated_tsx_code)
-            print(f"\n--- Successfully saved generated TSX code to {output_tsx_path} ---")
-        except Exception as e:
-            print(f"\n--- ERROR: Failed to save generated TSX code to {output_tsx_path}: {e} ---")
-            print("\n--- Generated TSX Code (from memory) ---")
-            print(generated_tsx_code) # Print code if saving failed
+    if saved:
+        print(f"\n--- Successfully saved generated TSX code to {output_tsx_path} ---")
     else:
         print("\n--- Failed to generate TSX code, nothing saved. ---")
 
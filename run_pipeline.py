@@ -1,26 +1,38 @@
 import asyncio
-import json
+import logging
 import os
 import sys
 import argparse
-from typing import Optional
+import orjson
+from typing import AsyncIterable, AsyncIterator, Iterable, Optional, Union
+
+# Pipeline logs go to stderr (stdout carries the TSX) through their own handler, leaving the root logger
+# for the agent modules' basicConfig. Level from PIPELINE_LOG_LEVEL; DEBUG messages are only formatted when enabled
+PIPELINE_LOG_LEVEL = os.getenv("PIPELINE_LOG_LEVEL", "INFO").upper()
+if PIPELINE_LOG_LEVEL not in logging.getLevelNamesMapping():
+    sys.exit(f"Invalid PIPELINE_LOG_LEVEL {PIPELINE_LOG_LEVEL!r}; use one of DEBUG, INFO, WARNING, ERROR, CRITICAL.")
+_log_handler = logging.StreamHandler(sys.stderr)
+_log_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+log = logging.getLogger('pipeline')
+log.addHandler(_log_handler)
+log.setLevel(PIPELINE_LOG_LEVEL)
+log.propagate = False # Already written by our handler
 
 # Import agent runners
 try:
     # Stonk Research Agent
     from stonk_research_agent.agent import main as run_stonk_research
     from stonk_research_agent.agent import find_tool_output # Need this helper
-    from stonk_research_agent.tools import FullResearchReport, SymbolResearchData, WebSearchOutput, HttpUrl, WebSearchNewsArticle # Import necessary models
+    from stonk_research_agent.tools import FullResearchReport, SymbolResearchData, WebSearchOutput # Import necessary models
     from pydantic import ValidationError
     # Dashboard Generator Agent - NEW IMPORT
     from project_agents.dashboard_agent.agent import run_tsx_generation
-    print("DEBUG: Successfully imported agent runners and models.", file=sys.stderr) # Redirect to stderr
+    log.debug("Successfully imported agent runners and models.")
 except ImportError as e:
-    print(f"ERROR: Failed to import agent runners or models: {e}", file=sys.stderr) # Also redirect error fallback message
+    log.error("Failed to import agent runners or models: %s", e)
     # Define fallbacks for script execution
-    async def run_stonk_research(query: str):
-        print(f"ERROR: Fallback run_stonk_research called for query: {query}")
-        # Simulate the structure expected by find_tool_output and downstream logic
+    async def run_stonk_research(query: str, output_filename: Optional[str] = None):
+        log.error("Fallback run_stonk_research called for query: %s", query)
         # Need to return an object that looks like RunResult with new_items
         class MockItem:
             def __init__(self, tool_name, output):
@@ -29,7 +41,7 @@ except ImportError as e:
         class MockRunResult:
             def __init__(self):
                 error_report = FullResearchReport(report=[SymbolResearchData(symbol="ERROR", web_search=WebSearchOutput(error="Stonk agent import failed"))])
-                self.new_items = [MockItem("run_full_research", error_report.model_dump_json(indent=2))]
+                self.new_items = [MockItem("run_full_research", error_report.model_dump_json())]
                 self.final_output = None # Or some error text
 
             def final_output_as(self, type):
@@ -46,115 +58,203 @@ except ImportError as e:
 
     # Fallback for missing run_tsx_generation
     def run_tsx_generation(json_str: str) -> str:
-        print("ERROR: Fallback run_tsx_generation called.", file=sys.stderr)
+        log.error("Fallback run_tsx_generation called.")
         return f'<p class="text-red-500">Error: Dashboard agent import failed.</p>'
     FullResearchReport = None
     ValidationError = Exception
 
 
-async def run_full_pipeline(stock_query: str):
+PIPELINE_CONC = int(os.getenv("PIPELINE_CONC", "8")) # Max queries researched/generated concurrently
+BATCH_SENTINEL = os.getenv("PIPELINE_BATCH_SENTINEL", "<<<END_OF_DASHBOARD>>>") # Printed after each TSX blob in --batch mode
+VALIDATE_REPORT = os.getenv("PIPELINE_VALIDATE_REPORT", "0") == "1" # Re-validate research output against FullResearchReport
+
+# Error payloads handed to the dashboard agent: only the message is serialized per call
+_ERROR_JSON_TEMPLATE = '{"error":%s}'
+_ERROR_REPORT_TEMPLATE = '{"report":[{"symbol":"ERROR","web_search":{"error":%s}}]}'
+
+
+def _json_str(message: str) -> str:
+    """Returns `message` as an escaped JSON string literal."""
+    return orjson.dumps(message).decode()
+
+
+_BASE_RESEARCH_MISSING_JSON = _ERROR_REPORT_TEMPLATE % _json_str("Base research data missing.")
+_PIPELINE_FAILED_JSON = _ERROR_JSON_TEMPLATE % _json_str("Pipeline failed before dashboard generation.")
+
+
+async def research_query(stock_query: str) -> str:
     """
-    Runs the full pipeline: stonk research -> dashboard generation.
-    Prints the final TSX code to stdout.
+    Pipeline stage 1: runs the stonk research agent for one query and merges its outputs.
+    Returns the research JSON string for the dashboard agent (an error structure on failure).
     """
-    print(f"DEBUG: Starting pipeline for query: '{stock_query}'", file=sys.stderr) # Use stderr for logs
+    log.debug("Starting pipeline for query: '%s'", stock_query)
 
     # 1. Run Stonk Research Agent
     stonk_agent_run_result = None
     research_json_str: Optional[str] = None
     web_analysis_obj = None # From stonk agent
-    merged_report_obj: Optional[FullResearchReport] = None # Final merged report
 
     try:
-        print("DEBUG: Running Stonk Research Agent...", file=sys.stderr)
-        # run_stonk_research needs to return the RunResult object for processing
-        stonk_agent_run_result = await run_stonk_research(stock_query)
-        print("DEBUG: Stonk Research Agent finished.", file=sys.stderr)
-
-        # Extract WebAnalysisOutput (Primary output of StonkResearchAgent)
+        log.debug("Running Stonk Research Agent...")
+        # No output file: queries run concurrently and would overwrite each other's stonk_research_output.json
+        stonk_agent_run_result = await run_stonk_research(stock_query, output_filename=None)
+        log.debug("Stonk Research Agent finished.")
         try:
             # Assuming WebAnalysisOutput is defined/imported correctly
             from stonk_research_agent.agent import WebAnalysisOutput # Ensure it's imported
             web_analysis_obj = stonk_agent_run_result.final_output_as(WebAnalysisOutput)
-            print("DEBUG: Extracted WebAnalysisOutput from stonk agent.", file=sys.stderr)
+            log.debug("Extracted WebAnalysisOutput from stonk agent.")
         except Exception as e:
-            print(f"ERROR: Failed to extract WebAnalysisOutput: {e}", file=sys.stderr)
+            log.error("Failed to extract WebAnalysisOutput: %s", e)
             web_analysis_obj = None # Or create a dummy error object
 
         # Extract the JSON output from the 'run_full_research' tool call within the stonk agent run
-        research_json_str = find_tool_output(stonk_agent_run_result.new_items, "run_full_research")
+        # (prefer the stonk agent's tool-name index, falling back to a scan of the run items)
+        tool_outputs_by_name = getattr(stonk_agent_run_result, 'tool_outputs_by_name', None)
+        research_json_str = tool_outputs_by_name.get("run_full_research") if tool_outputs_by_name else None
+        if research_json_str is None:
+            research_json_str = find_tool_output(stonk_agent_run_result.new_items, "run_full_research")
 
         if research_json_str and FullResearchReport:
             try:
-                # Load the base report from the tool output
-                parsed_data = json.loads(research_json_str)
-                base_report_obj = FullResearchReport(**parsed_data)
-                print("DEBUG: Successfully parsed 'run_full_research' output.", file=sys.stderr)
-
-                # Merge WebAnalysis into the report
-                if base_report_obj.report and web_analysis_obj:
-                    target_symbol_data = base_report_obj.report[0]
-                    try:
-                         key_urls_as_httpurl = [HttpUrl(str(url_str)) for url_str in web_analysis_obj.key_source_urls]
-                    except ValidationError as url_val_error:
-                         print(f"WARN: Error converting key_source_urls back to HttpUrl: {url_val_error}. Using empty list.", file=sys.stderr)
-                         key_urls_as_httpurl = []
-
-                    merged_web_search = WebSearchOutput(
-                         query=None,
-                         overall_summary=web_analysis_obj.overall_summary,
-                         relevant_news=web_analysis_obj.relevant_news,
-                         key_source_urls=key_urls_as_httpurl,
-                         error=web_analysis_obj.error
-                    )
-                    target_symbol_data.web_search = merged_web_search
-                    merged_report_obj = base_report_obj
-                    print(f"DEBUG: Merged WebAnalysisOutput into report for {target_symbol_data.symbol}.", file=sys.stderr)
+                # Load the base report from the tool output as plain dicts; the tool already emitted
+                # a validated FullResearchReport, so it is not rebuilt into models here
+                parsed_data = orjson.loads(research_json_str)
+                if VALIDATE_REPORT:
+                    FullResearchReport.model_validate_json(research_json_str) # Debug-only schema check, validated straight from the JSON text
+                log.debug("Successfully parsed 'run_full_research' output.")
+                report = parsed_data.get('report')
+                web_analysis_error = getattr(web_analysis_obj, 'error', None)
+                if web_analysis_error:
+                    # Failed analysis: nothing worth merging, pass the base report through unchanged
+                    log.warning("Web analysis failed (%s); using base report without it.", web_analysis_error)
+                elif report and web_analysis_obj:
+                    target_symbol_data = report[0]
+                    # Same shape as WebSearchOutput: query, overall_summary, relevant_news, key_source_urls, error
+                    target_symbol_data['web_search'] = {'query': None, **web_analysis_obj.model_dump(mode='json')}
+                    log.debug("Merged WebAnalysisOutput into report for %s.", target_symbol_data.get('symbol'))
                 else:
-                     print("WARN: Could not merge WebAnalysisOutput (missing report data or web analysis obj).", file=sys.stderr)
-                     merged_report_obj = base_report_obj # Use base report anyway
-
-                # Use the merged report JSON for the dashboard agent
-                research_json_string_for_dashboard = merged_report_obj.model_dump_json(indent=2)
+                     log.warning("Could not merge WebAnalysisOutput (missing report data or web analysis obj).")
+                research_json_string_for_dashboard = orjson.dumps(parsed_data).decode()
 
-            except (json.JSONDecodeError, ValidationError) as e:
-                print(f"ERROR: Failed to process 'run_full_research' output JSON: {e}", file=sys.stderr)
-                research_json_string_for_dashboard = json.dumps({"error": f"Failed to process base research: {e}"})
+            except (orjson.JSONDecodeError, ValidationError) as e:
+                log.error("Failed to process 'run_full_research' output JSON: %s", e)
+                research_json_string_for_dashboard = _ERROR_JSON_TEMPLATE % _json_str(f"Failed to process base research: {e}")
         else:
-            print("WARN: 'run_full_research' output not found or FullResearchReport model missing.", file=sys.stderr)
-            # Create minimal JSON for dashboard agent indicating error
-            research_json_string_for_dashboard = json.dumps({"report": [{"symbol": "ERROR", "web_search": {"error": "Base research data missing."}}]})
+            log.warning("'run_full_research' output not found or FullResearchReport model missing.")
+            research_json_string_for_dashboard = _BASE_RESEARCH_MISSING_JSON
 
     except Exception as e:
-        print(f"ERROR: Stonk Research Agent run failed: {e}", file=sys.stderr)
-        research_json_string_for_dashboard = json.dumps({"report": [{"symbol": "ERROR", "web_search": {"error": f"Stonk agent run failed: {e}"}}]})
-        print("DEBUG: Using error JSON for dashboard generation due to stonk agent failure.", file=sys.stderr)
+        log.error("Stonk Research Agent run failed: %s", e)
+        research_json_string_for_dashboard = _ERROR_REPORT_TEMPLATE % _json_str(f"Stonk agent run failed: {e}")
+        log.debug("Using error JSON for dashboard generation due to stonk agent failure.")
+
+    return research_json_string_for_dashboard
+
 
-    # 2. Generate TSX Code using Dashboard Agent
-    print("DEBUG: Calling Dashboard Agent (run_tsx_generation)...", file=sys.stderr)
+async def generate_dashboard(research_json_string_for_dashboard: str) -> str:
+    """
+    Pipeline stage 2: generates the TSX code (or an error message) using the Dashboard Agent.
+    """
+    log.debug("Calling Dashboard Agent (run_tsx_generation)...")
     final_output_string = "" # Initialize
     try:
         # Ensure we always have a valid JSON string, even if it's an error structure
         if not research_json_string_for_dashboard:
-             print("CRITICAL: research_json_string_for_dashboard was None before calling dashboard agent. Creating error JSON.", file=sys.stderr)
-             research_json_string_for_dashboard = json.dumps({"error": "Pipeline failed before dashboard generation."})
+             log.critical("research_json_string_for_dashboard was None before calling dashboard agent. Creating error JSON.")
+             research_json_string_for_dashboard = _PIPELINE_FAILED_JSON
 
-        # Call the dashboard agent function synchronously (adjust if it becomes async)
-        final_output_string = run_tsx_generation(research_json_string_for_dashboard)
-        print(f"DEBUG: Dashboard Agent finished. Output length: {len(final_output_string)}", file=sys.stderr)
+        # run_tsx_generation is synchronous (ESLint/LLM work); run it in a worker thread so the
+        # event loop can keep researching the next query meanwhile
+        final_output_string = await asyncio.to_thread(run_tsx_generation, research_json_string_for_dashboard)
+        log.debug("Dashboard Agent finished. Output length: %s", len(final_output_string))
 
     except Exception as dash_e:
-        print(f"ERROR: Dashboard Agent (run_tsx_generation) failed: {dash_e}", file=sys.stderr)
+        log.error("Dashboard Agent (run_tsx_generation) failed: %s", dash_e)
         final_output_string = f'<p class="text-red-500">Error: Dashboard generation step failed: {dash_e}</p>'
 
-    # 3. Print final TSX string (or error message) to stdout (for the API route)
-    print(final_output_string, file=sys.stdout)
+    return final_output_string
+
+
+async def _iterate_queries(stock_queries: Iterable[str]) -> AsyncIterator[str]:
+    for stock_query in stock_queries:
+        yield stock_query
+
+
+async def read_stdin_queries() -> AsyncIterator[str]:
+    """Yields newline-delimited queries from stdin (blank lines skipped) until EOF, for --batch mode."""
+    while line := await asyncio.to_thread(sys.stdin.readline): # Don't block the loop while waiting for input
+        if stock_query := line.strip():
+            yield stock_query
+
+
+async def process_query(stock_query: str) -> str:
+    """
+    Runs both pipeline stages for one query and returns its TSX code. Never raises, so one failing
+    query can't take down the rest of a batch.
+    """
+    try:
+        return await generate_dashboard(await research_query(stock_query))
+    except Exception as e:
+        log.error("Pipeline failed for query '%s': %s", stock_query, e)
+        return f'<p class="text-red-500">Error: Pipeline failed: {e}</p>'
+
+
+async def run_full_pipeline(stock_queries: Union[str, Iterable[str], AsyncIterable[str]], sentinel: Optional[str] = None):
+    """
+    Runs the full pipeline for each query: stonk research -> dashboard generation.
+    Up to PIPELINE_CONC queries are processed concurrently, so a batch takes roughly as long as
+    its slowest queries rather than the sum of all of them. Prints each final TSX code to stdout,
+    in query order, followed by `sentinel` (if given) so a caller streaming several queries can
+    split the output.
+    """
+    if isinstance(stock_queries, str):
+        stock_queries = [stock_queries] # Single-query callers
+    if not isinstance(stock_queries, AsyncIterable):
+        stock_queries = _iterate_queries(stock_queries)
+    inflight = asyncio.Semaphore(PIPELINE_CONC)
+    # Started queries in input order; bounded so we don't run far ahead of the printed output
+    pending_q: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_CONC)
+
+    async def process_limited(stock_query: str) -> str:
+        async with inflight:
+            return await process_query(stock_query)
+
+    async with asyncio.TaskGroup() as tg:
+        async def query_producer():
+            async for stock_query in stock_queries:
+                await pending_q.put(tg.create_task(process_limited(stock_query)))
+            await pending_q.put(None) # No more queries
+
+        async def output_consumer():
+            # Write encoded bytes straight to the binary stdout instead of print()ing through the text layer
+            out = sys.stdout.buffer
+            sentinel_line = None if sentinel is None else f"{sentinel}\n".encode('utf-8')
+            while (query_task := await pending_q.get()) is not None:
+                final_output_string = await query_task
+                # 3. Write final TSX string (or error message) to stdout (for the API route)
+                sys.stdout.flush() # Keep ordering with anything imported code print()ed
+                out.write(final_output_string.encode('utf-8'))
+                out.write(b"\n")
+                if sentinel_line is not None:
+                    out.write(sentinel_line)
+                out.flush() # Hand each result over as soon as it is ready
+
+        tg.create_task(query_producer())
+        tg.create_task(output_consumer())
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Stonk Research and Dashboard Generation Pipeline.")
-    parser.add_argument("stock_query", help="The stock symbol or company name to research (e.g., 'NVDA', 'NVIDIA Corporation').")
+    parser.add_argument("stock_query", nargs='*', help="The stock symbol(s) or company name(s) to research (e.g., 'NVDA', 'NVIDIA Corporation').")
+    parser.add_argument("--batch", action="store_true",
+                        help=f"Read one query per line from stdin in a single long-lived process; each TSX result is followed by a '{BATCH_SENTINEL}' line.")
     args = parser.parse_args()
+    if args.batch == bool(args.stock_query):
+        parser.error("pass either stock_query arguments or --batch")
 
-    asyncio.run(run_full_pipeline(args.stock_query))
-    print("DEBUG: Pipeline Runner finished.", file=sys.stderr)
+    if args.batch:
+        asyncio.run(run_full_pipeline(read_stdin_queries(), sentinel=BATCH_SENTINEL))
+    else:
+        asyncio.run(run_full_pipeline(args.stock_query))
+    log.debug("Pipeline Runner finished.")
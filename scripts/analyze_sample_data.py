@@ -1,8 +1,11 @@
-import json
+import csv
 import logging
+import mmap
+import os
 import re
-import csv
-from typing import List, Dict, Any, Optional, Set
+import ijson
+import orjson
+from typing import BinaryIO, Iterator, List, Dict, Any, Optional, FrozenSet, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -14,29 +17,62 @@ INPUT_ASSETS_JSON = "sample_assets_2k.json" # Changed input source
 INPUT_TRANSACTIONS_JSON = "sample_transactions_2k.json" # Changed input source
 OUTPUT_CSV_FILE = "public_entity_transactions.csv"
 
-# Transaction types considered relevant for public entity trading
-RELEVANT_TRANSACTION_TYPES: Set[str] = {
+# Transaction types considered relevant for public entity trading (frozenset: checked once per transaction)
+RELEVANT_TRANSACTION_TYPES: FrozenSet[str] = frozenset({
     "Buy", "Sell", "Subscription", "Redemption", "Exchange", "Merger",
     "Split", "SpinOff", "OpenLongPosition", "OpenShortPosition",
     "CorporateAction" # Adding CorporateAction as potentially relevant
-}
+})
+
+OUTPUT_COLUMNS: List[str] = [
+    "transaction_id", "asset_id", "asset_isin", "asset_name",
+    "transaction_type", "transaction_date", "value_date",
+    "quantity", "price", "price_currency", "portfolio_id"
+]
+
+# The only asset fields build_instrument_map reads
+NEEDED_ASSET_KEYS: Tuple[str, ...] = ('@odata.type', 'id', 'isin', 'name')
+
+MMAP_MIN_BYTES = 1024 * 1024 # Below this a plain read() is cheaper than setting up a mapping
 
-def load_json_data(json_file_path: str) -> Optional[List[Dict[str, Any]]]:
-    """Loads a list of records directly from a JSON file."""
+
+def _loads_file(f: BinaryIO) -> Any:
+    """Parses a JSON file with orjson, straight from a read-only memory map for large files."""
+    if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+        return orjson.loads(f.read())
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm) # orjson takes a memoryview, not the mmap object itself
+        try:
+            return orjson.loads(view)
+        finally:
+            view.release() # The mmap can't close while a view is exported
+
+
+def load_json_data(json_file_path: str, keys: Optional[Tuple[str, ...]] = None) -> Optional[List[Dict[str, Any]]]:
+    """Loads a list of records directly from a JSON file, keeping only `keys` of each record if given."""
     # Removed extra """ here
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            data = _loads_file(f)
             if isinstance(data, list):
-                logging.info(f"Successfully loaded {len(data)} records from {json_file_path}")
-                return data
+                # Drop non-object elements once here, so consumers don't re-check every record
+                if keys is None:
+                    records = [record for record in data if isinstance(record, dict)]
+                else:
+                    # Project to the needed fields, so the full parsed records are freed once we return
+                    records = [{key: record[key] for key in keys if key in record}
+                               for record in data if isinstance(record, dict)]
+                if len(records) != len(data):
+                    logging.warning(f"Skipped {len(data) - len(records)} non-object elements in {json_file_path}")
+                logging.info(f"Successfully loaded {len(records)} records from {json_file_path}")
+                return records
             else:
                 logging.error(f"Loaded JSON from {json_file_path} is not a list.")
                 return None
     except FileNotFoundError:
         logging.error(f"Input JSON file not found: {json_file_path}")
         return None
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logging.error(f"Failed to decode JSON from {json_file_path}: {e}")
         return None
     except Exception as e:
@@ -44,100 +80,103 @@ def load_json_data(json_file_path: str) -> Optional[List[Dict[str, Any]]]:
         return None # Return None on error, consistent with other error paths
 
 
-def analyze_and_export(assets: List[Dict[str, Any]], transactions: List[Dict[str, Any]], output_csv_path: str):
+def build_instrument_map(assets: List[Dict[str, Any]]) -> Dict[Any, Tuple[str, Any]]:
+    """Maps asset_id -> (isin, name) for instruments with an ISIN."""
+    # A single comprehension pass with dict.get bound once; later records win for duplicate ids
+    get = dict.get
+    return {
+        asset['id']: (asset['isin'], get(asset, 'name', 'N/A')) # Use N/A if name is missing
+        for asset in assets # Records from load_json_data, already filtered to dicts
+        if get(asset, '@odata.type') == '#WealthArc.Instrument'
+        and get(asset, 'id') is not None
+        and get(asset, 'isin')
+    }
+
+
+def stream_relevant_transactions(transactions_file: BinaryIO,
+                                 instrument_map: Dict[Any, Tuple[str, Any]]) -> Iterator[Tuple[Any, ...]]:
     """
-    Analyzes assets and transactions, filters relevant data, and exports to CSV.
+    Incrementally parses a JSON array of transactions and yields output rows (tuples in
+    OUTPUT_COLUMNS order) for relevant ones only.
+    Filtering happens inside the parse loop, so non-matching transactions are dropped as soon as
+    they are parsed instead of the whole list being held in memory.
+    """
+    for tx in ijson.items(transactions_file, 'item', use_float=True): # yajl2_c backend when available
+        # Reject on the (cheap, usually failing) type check first, then a single map lookup
+        try:
+            tx_type = tx.get('type')
+        except AttributeError: # Not a JSON object; checked this way instead of isinstance() on every row
+            continue
+        if tx_type not in RELEVANT_TRANSACTION_TYPES:
+            continue
+        asset_id = tx.get('assetId')
+        asset_info = instrument_map.get(asset_id)
+        if asset_info is None: # Not a known instrument with an ISIN
+            continue
+
+        isin, name = asset_info
+        yield (
+            tx.get('id'), asset_id, isin, name,
+            tx_type, tx.get('transactionDate'), tx.get('valueDate'),
+            tx.get('quantity'), tx.get('price'), tx.get('priceCurrency'), tx.get('portfolioId'),
+        )
+
+
+def analyze_and_export(assets: List[Dict[str, Any]], transactions_file: BinaryIO, output_csv_path: str):
+    """
+    Analyzes assets and (streamed) transactions, filters relevant data, and exports to CSV.
+    Relevant rows are written as they are parsed; nothing is accumulated in memory.
     """
     if not assets:
         logging.warning("No Assets data provided.")
-    if not transactions:
-        logging.warning("No Transactions data provided.")
-        # Decide if we should still create an empty CSV or return
-
-    # 1. Create a map of asset_id -> {isin, name} for instruments with ISINs
-    instrument_map: Dict[int, Dict[str, str]] = {}
-    instruments_with_isin_count = 0
-    for asset in assets:
-        if (isinstance(asset, dict) and
-            asset.get('@odata.type') == '#WealthArc.Instrument' and
-            asset.get('id') is not None and
-            asset.get('isin')):
-            instrument_map[asset['id']] = {
-                "isin": asset['isin'],
-                "name": asset.get('name', 'N/A') # Use N/A if name is missing
-            }
-            instruments_with_isin_count += 1
-    logging.info(f"Created map for {instruments_with_isin_count} instruments with ISINs from the assets sample.")
+
+    # 1. Create a map of asset_id -> (isin, name) for instruments with ISINs
+    instrument_map = build_instrument_map(assets)
+    logging.info(f"Created map for {len(instrument_map)} instruments with ISINs from the assets sample.")
     if not instrument_map:
          logging.warning("No instruments with ISIN found in the Assets sample. CSV will likely be empty.")
          # Still proceed to create empty CSV if needed
 
-    # 2. Filter transactions and combine with asset info
-    output_data: List[Dict[str, Any]] = []
+    # 2./3. Filter transactions while parsing and write each relevant row straight to a temp CSV,
+    # which replaces the output only once the whole transactions file has parsed
     relevant_transactions_count = 0
-    for tx in transactions:
-        if not isinstance(tx, dict):
-            continue
-
-        asset_id = tx.get('assetId')
-        tx_type = tx.get('type')
-
-        # Check if transaction type is relevant and if the asset is a known instrument with an ISIN
-        if tx_type in RELEVANT_TRANSACTION_TYPES and asset_id in instrument_map:
-            asset_info = instrument_map[asset_id]
-            output_data.append({
-                "transaction_id": tx.get('id'),
-                "asset_id": asset_id,
-                "asset_isin": asset_info['isin'],
-                "asset_name": asset_info['name'],
-                "transaction_type": tx_type,
-                "transaction_date": tx.get('transactionDate'),
-                "value_date": tx.get('valueDate'),
-                "quantity": tx.get('quantity'),
-                "price": tx.get('price'),
-                "price_currency": tx.get('priceCurrency'),
-                "portfolio_id": tx.get('portfolioId'),
-            })
-            relevant_transactions_count += 1
-
-    logging.info(f"Found {relevant_transactions_count} relevant transactions involving instruments with ISINs.")
-
-    # 3. Write to CSV
-    if not output_data:
-        logging.warning("No data to write to CSV.")
-        # Create empty CSV with headers?
-        fieldnames = [
-            "transaction_id", "asset_id", "asset_isin", "asset_name",
-            "transaction_type", "transaction_date", "value_date",
-            "quantity", "price", "price_currency", "portfolio_id"
-        ]
-        try:
-             with open(output_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-             logging.info(f"Created empty CSV file with headers: {output_csv_path}")
-        except Exception as e:
-             logging.error(f"Failed to write empty CSV header: {e}")
-        return
-
-    fieldnames = list(output_data[0].keys()) # Get headers from the first record
+    temp_path = f"{output_csv_path}.{os.getpid()}.tmp" # Same directory, so os.replace is atomic
     try:
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(output_data)
-        logging.info(f"Successfully wrote {len(output_data)} relevant transaction records to {output_csv_path}")
+        with open(temp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile) # Rows are plain tuples, no per-field dict lookups
+            writer.writerow(OUTPUT_COLUMNS) # An empty result still gets the header row
+            for row in stream_relevant_transactions(transactions_file, instrument_map):
+                writer.writerow(row)
+                relevant_transactions_count += 1
+        os.replace(temp_path, output_csv_path)
+    except ijson.JSONError as e:
+        logging.error(f"Failed to decode transactions JSON, leaving {output_csv_path} unchanged: {e}")
+        return
     except Exception as e:
         logging.error(f"Failed to write data to CSV {output_csv_path}: {e}")
+        return
+    finally:
+        if os.path.exists(temp_path): # Only still there if the export did not complete
+            os.remove(temp_path)
+
+    logging.info(f"Found {relevant_transactions_count} relevant transactions involving instruments with ISINs.")
+    if relevant_transactions_count:
+        logging.info(f"Successfully wrote {relevant_transactions_count} relevant transaction records to {output_csv_path}")
+    else:
+        logging.warning(f"No data to write to CSV. Created empty CSV file with headers: {output_csv_path}")
 
 
 if __name__ == "__main__":
-    logging.info(f"Loading data from {INPUT_ASSETS_JSON} and {INPUT_TRANSACTIONS_JSON}...")
-    assets_data = load_json_data(INPUT_ASSETS_JSON)
-    transactions_data = load_json_data(INPUT_TRANSACTIONS_JSON)
+    logging.info(f"Loading data from {INPUT_ASSETS_JSON} and streaming {INPUT_TRANSACTIONS_JSON}...")
+    assets_data = load_json_data(INPUT_ASSETS_JSON, keys=NEEDED_ASSET_KEYS) # The assets file is small enough to load whole
 
-    if assets_data is not None and transactions_data is not None:
-        analyze_and_export(assets_data, transactions_data, OUTPUT_CSV_FILE)
+    if assets_data is not None:
+        try:
+            with open(INPUT_TRANSACTIONS_JSON, 'rb') as transactions_file:
+                analyze_and_export(assets_data, transactions_file, OUTPUT_CSV_FILE)
+        except FileNotFoundError:
+            logging.error(f"Input JSON file not found: {INPUT_TRANSACTIONS_JSON}")
+            logging.error("Failed to load necessary data from JSON files. Analysis aborted.")
     else:
         logging.error("Failed to load necessary data from JSON files. Analysis aborted.")
 
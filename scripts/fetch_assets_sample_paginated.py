@@ -1,7 +1,10 @@
-import json
 import logging
+import os
+import orjson
 import time
-import wealtharc_client # Import the updated client
+import asyncio
+from collections import deque
+import wealtharc_client # Import the updated async client
 
 # Configure logging
 logging.basicConfig(
@@ -10,85 +13,134 @@ logging.basicConfig(
 )
 
 OUTPUT_JSON_FILE = "sample_assets_2k.json" # New output file name
+OUTPUT_JSONL_FILE = OUTPUT_JSON_FILE + ".jsonl" # Pages are streamed here as they arrive, one record per line
 PAGE_SIZE = 200 # Use a smaller page size
 TARGET_RECORDS = 2000 # Target number of records to fetch
+FETCH_CONCURRENCY = 4 # Max pages requested at once (the client's own semaphore may cap this further)
+MAX_REQUESTS_PER_SECOND = 5 # Replaces the fixed 0.5s sleep between pages
 
-def fetch_assets_sample_paginated(target_records: int):
+class RateLimiter:
+    """Allows at most `max_calls` acquisitions in any sliding one-second window."""
+
+    def __init__(self, max_calls: int):
+        self.max_calls = max_calls
+        self.calls = deque() # Monotonic timestamps of recent acquisitions
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= 1.0:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                await asyncio.sleep(1.0 - (now - self.calls[0]))
+
+async def fetch_assets_sample_paginated(target_records: int, jsonl_path: str):
     """
-    Fetches a sample of assets from the API using pagination,
-    stopping after reaching the target number of records.
+    Fetches a sample of assets from the API using concurrent pagination,
+    stopping after reaching the target number of records or a short page.
+    Records are appended to `jsonl_path` as ND-JSON in offset order as soon as
+    their page (and every page before it) has arrived, so memory stays bounded
+    by the pages in flight. Returns the number of records written, or None on failure.
     """
-    all_assets = []
-    current_skip = 0
-    fetch_more = True
-    page_num = 1
-
-    logging.info(f"Starting paginated fetch for Assets sample (target={target_records}) with page size {PAGE_SIZE}...")
-
-    while fetch_more:
-        # Determine how many to fetch in this request
-        remaining_needed = target_records - len(all_assets)
-        current_top = min(PAGE_SIZE, remaining_needed)
-        if current_top <= 0:
-             fetch_more = False
-             break
-
-        logging.info(f"Fetching page {page_num} (skip={current_skip}, top={current_top})...")
-        try:
-            # Use the get_assets function from the client
-            response_data = wealtharc_client.get_assets(top=current_top, skip=current_skip)
-
-            if response_data and isinstance(response_data.get('value'), list):
-                assets_page = response_data['value']
-                if assets_page:
-                    all_assets.extend(assets_page)
-                    logging.info(f"Fetched {len(assets_page)} assets on page {page_num}. Total fetched: {len(all_assets)}")
-
-                    # Check if we've fetched enough records or if it was the last page from API
-                    if len(all_assets) >= target_records:
-                        fetch_more = False
-                        logging.info(f"Reached target of {target_records} records.")
-                    elif len(assets_page) < current_top:
-                        fetch_more = False
-                        logging.info("API returned fewer records than requested, assuming end of data.")
-                    else:
-                        # Continue to next page
-                        current_skip += current_top
-                        page_num += 1
-                        time.sleep(0.5) # Add delay
-                else:
-                    fetch_more = False
-                    logging.info("Received empty 'value' array. No more assets to fetch.")
-            else:
-                logging.error(f"Failed to fetch or parse page {page_num}. Response: {response_data}")
-                fetch_more = False
-                all_assets = None
-
-        except Exception as e:
-            logging.error(f"An unexpected error occurred during fetch for page {page_num}: {e}")
-            fetch_more = False
-            all_assets = None
-
-    return all_assets
-
-def save_data(data, output_file_path):
-    """Saves the collected data to a JSON file."""
-    if data is None:
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
+    end_skip = None # Skip offset of the first short page seen; later pages are not requested
+    completed = {} # page_num -> (page, top) for pages waiting on an earlier page
+    next_page = 1
+    written = 0
+    failed = False
+    reached_end = False
+
+    def write_ready_pages(out_f):
+        nonlocal next_page, written, failed, reached_end
+        while not (failed or reached_end) and next_page in completed:
+            assets_page, top = completed.pop(next_page)
+            if assets_page is None:
+                failed = True
+                break
+            out_f.writelines(orjson.dumps(record) + b"\n" for record in assets_page)
+            written += len(assets_page)
+            next_page += 1
+            reached_end = len(assets_page) < top
+        if failed or reached_end:
+            completed.clear()
+
+    async def fetch_page(out_f, page_num: int, skip: int, top: int):
+        nonlocal end_skip
+        async with semaphore:
+            await limiter.acquire()
+            if failed or (end_skip is not None and skip > end_skip):
+                return
+            logging.info(f"Fetching page {page_num} (skip={skip}, top={top})...")
+            response_data = await wealtharc_client.get_assets(top=top, skip=skip)
+
+        if response_data and isinstance(response_data.get('value'), list):
+            assets_page = response_data['value']
+            logging.info(f"Fetched {len(assets_page)} assets on page {page_num}.")
+            if len(assets_page) < top and (end_skip is None or skip < end_skip):
+                end_skip = skip
+        else:
+            logging.error(f"Failed to fetch or parse page {page_num}. Response: {response_data}")
+            assets_page = None
+        completed[page_num] = (assets_page, top)
+        write_ready_pages(out_f)
+
+    logging.info(f"Starting concurrent paginated fetch for Assets sample (target={target_records}) with page size {PAGE_SIZE}...")
+    try:
+        with open(jsonl_path, 'wb') as out_f:
+            await asyncio.gather(*(fetch_page(out_f, page_num, skip, min(PAGE_SIZE, target_records - skip))
+                                   for page_num, skip in enumerate(range(0, target_records, PAGE_SIZE), start=1)))
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during fetch: {e}")
+        return None
+
+    if failed:
+        logging.error(f"Stopped after {written} assets; partial results kept in {jsonl_path}")
+        return None
+    if reached_end:
+        logging.info("API returned fewer records than requested, assuming end of data.")
+    else:
+        logging.info(f"Reached target of {target_records} records.")
+    logging.info(f"Total fetched: {written}")
+    return written
+
+def write_json_array(jsonl_path: str, output_file_path: str):
+    """Re-materializes an ND-JSON file as a JSON array (one record per line) without parsing it."""
+    with open(jsonl_path, 'rb') as src, open(output_file_path, 'wb') as dst:
+        dst.write(b"[")
+        separator = b"\n"
+        for line in src:
+            dst.write(separator)
+            dst.write(line.rstrip(b"\n"))
+            separator = b",\n"
+        dst.write(b"\n]\n")
+
+def save_data(record_count, jsonl_path, output_file_path):
+    """Saves the streamed records to a JSON file and removes the ND-JSON sidecar."""
+    if record_count is None:
         logging.error("Cannot save data because fetching failed.")
         return
 
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        logging.info(f"Successfully saved {len(data)} assets to {output_file_path}")
+        write_json_array(jsonl_path, output_file_path)
+        os.remove(jsonl_path)
+        logging.info(f"Successfully saved {record_count} assets to {output_file_path}")
     except Exception as e:
         logging.error(f"Failed to save data to {output_file_path}: {e}")
 
-if __name__ == "__main__":
-    collected_assets = fetch_assets_sample_paginated(TARGET_RECORDS) # Pass target
-    if collected_assets is not None:
-        save_data(collected_assets, OUTPUT_JSON_FILE)
+async def main():
+    record_count = await fetch_assets_sample_paginated(TARGET_RECORDS, OUTPUT_JSONL_FILE) # Pass target
+    if record_count is not None:
+        save_data(record_count, OUTPUT_JSONL_FILE, OUTPUT_JSON_FILE)
     else:
         logging.error("Asset sample fetching process failed. No data saved.")
 
+    await wealtharc_client.close_client()
     logging.info("Asset sample fetching script finished.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
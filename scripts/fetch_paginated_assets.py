@@ -1,4 +1,4 @@
-import json
+import orjson
 import logging
 import math
 import asyncio
@@ -138,8 +138,16 @@ def save_data_sync(data, output_file_path):
         return True # Not an error
 
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # A JSON array with one compact record per line, so process_asset_data.py can prefilter
+        # the raw lines before parsing them
+        with open(output_file_path, 'wb', buffering=1 << 20) as f:
+            f.write(b"[")
+            separator = b"\n"
+            for record in data:
+                f.write(separator)
+                f.write(orjson.dumps(record))
+                separator = b",\n"
+            f.write(b"\n]\n")
         logging.info(f"Successfully saved {len(data)} assets to {output_file_path}")
         return True
     except Exception as e:
@@ -1,4 +1,4 @@
-import json
+import orjson
 import logging
 import math
 import asyncio
@@ -16,18 +16,24 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 OUTPUT_JSON_FILE = "all_portfolios.json"
 PAGE_SIZE = 500 # How many portfolios to fetch per API call
 MAX_ENTRIES_TO_FETCH = 10000 # Maximum number of entries to fetch for this endpoint
+MAX_INFLIGHT = 16 # Max page requests this script has in flight at once (the client may cap it further)
+_inflight = asyncio.Semaphore(MAX_INFLIGHT)
+
+def portfolio_page_value(response_data, skip: int) -> list:
+    """Returns the portfolios in a page response (empty on a bad response)."""
+    if response_data and isinstance(response_data.get('value'), list):
+        logging.info(f"Successfully fetched portfolio page: skip={skip}, count={len(response_data['value'])}")
+        return response_data['value']
+    logging.error(f"Failed to fetch or parse portfolio page: skip={skip}. Response: {response_data}")
+    return [] # Return empty list on page error
 
 async def fetch_portfolio_page(skip: int, top: int) -> list:
     """Fetches a single page of portfolios asynchronously."""
     logging.debug(f"Requesting portfolios page: skip={skip}, top={top}")
     try:
-        response_data = await wealtharc_client.get_portfolios(top=top, skip=skip)
-        if response_data and isinstance(response_data.get('value'), list):
-            logging.info(f"Successfully fetched portfolio page: skip={skip}, count={len(response_data['value'])}")
-            return response_data['value']
-        else:
-            logging.error(f"Failed to fetch or parse portfolio page: skip={skip}. Response: {response_data}")
-            return [] # Return empty list on page error
+        async with _inflight:
+            response_data = await wealtharc_client.get_portfolios(top=top, skip=skip)
+        return portfolio_page_value(response_data, skip)
     except Exception as e:
         logging.error(f"Exception fetching portfolio page: skip={skip}. Error: {e}", exc_info=True)
         return [] # Return empty list on exception
@@ -36,17 +42,20 @@ async def fetch_all_portfolios_concurrently():
     """
     Fetches portfolios from the API concurrently using pagination, up to MAX_ENTRIES_TO_FETCH.
     """
-    all_portfolios = []
+    by_id = {}
+    no_id = []
     total_count = 0
     target_fetch_count = 0
     num_pages = 0
 
-    # 1. Try to get total count first
-    logging.info("Fetching total portfolio count (if available)...")
+    # 1. Fetch the first page together with the total count ($count is returned alongside the data),
+    # saving a separate top=0 round trip before the concurrent fetch can start
+    logging.info("Fetching first portfolio page and total count (if available)...")
+    first_top = min(PAGE_SIZE, MAX_ENTRIES_TO_FETCH)
     try:
-        count_response = await wealtharc_client.get_portfolios(top=0, additional_params={"$count": "true"})
-        if count_response and "@odata.count" in count_response:
-            total_count = int(count_response["@odata.count"])
+        first_response = await wealtharc_client.get_portfolios(top=first_top, skip=0, additional_params={"$count": "true"})
+        if first_response and "@odata.count" in first_response:
+            total_count = int(first_response["@odata.count"])
             logging.info(f"API reported total portfolio count: {total_count}")
             if total_count == 0:
                 logging.info("Total count is 0. No portfolios to fetch.")
@@ -70,56 +79,62 @@ async def fetch_all_portfolios_concurrently():
          logging.info("Target fetch count is 0. No portfolios to fetch.")
          return []
 
-    # 2. Create tasks for the required pages
+    first_page = portfolio_page_value(first_response, 0)
+
+    # 2. Create tasks for the remaining pages
     tasks = []
-    logging.info(f"Preparing {num_pages} tasks for concurrent fetching...")
-    for i in range(num_pages):
+    logging.info(f"Preparing {num_pages - 1} tasks for concurrent fetching...")
+    for i in range(1, num_pages):
         skip = i * PAGE_SIZE
         remaining_to_fetch = target_fetch_count - (i * PAGE_SIZE)
         current_top = min(PAGE_SIZE, remaining_to_fetch)
         if current_top <= 0:
             break
-        task = fetch_portfolio_page(skip=skip, top=current_top)
+        task = asyncio.create_task(fetch_portfolio_page(skip=skip, top=current_top))
         tasks.append(task)
 
-    # 3. Run tasks concurrently and gather results
+    # 3. The tasks run concurrently; consume their pages in page order as they complete
     logging.info(f"Starting concurrent fetch of {len(tasks)} portfolio pages...")
-    results_list_of_lists = await asyncio.gather(*tasks)
 
-    # 4. Flatten the results
-    for page_result in results_list_of_lists:
+    # 4. Flatten and deduplicate in one pass as each page arrives, releasing the page afterwards.
+    # Only the first MAX_ENTRIES_TO_FETCH records collected are considered; of those, the first
+    # record per id is kept (dict keeps insertion order) and records without an id are all kept, after them
+    collected = 0
+
+    def add_page(page_result):
+        nonlocal collected
+        remaining = max(MAX_ENTRIES_TO_FETCH - collected, 0)
+        collected += len(page_result)
+        if len(page_result) > remaining:
+            page_result = page_result[:remaining]
+        for portfolio in page_result:
+            portfolio_id = portfolio.get('id')
+            if portfolio_id is None:
+                no_id.append(portfolio)
+            elif portfolio_id not in by_id:
+                by_id[portfolio_id] = portfolio
+
+    add_page(first_page)
+    del first_page
+    for i in range(len(tasks)):
+        page_result = await tasks[i]
+        tasks[i] = None # Drop the finished task and the page it holds
         if page_result:
-            all_portfolios.extend(page_result)
+            add_page(page_result)
 
-    logging.info(f"Finished fetching. Total portfolios collected: {len(all_portfolios)} (Target was: {target_fetch_count})")
+    logging.info(f"Finished fetching. Total portfolios collected: {collected} (Target was: {target_fetch_count})")
 
-    # 5. Truncate if collected more than MAX_ENTRIES_TO_FETCH
-    if len(all_portfolios) > MAX_ENTRIES_TO_FETCH:
-        logging.warning(f"Collected {len(all_portfolios)} portfolios, exceeding limit. Truncating to {MAX_ENTRIES_TO_FETCH}.")
-        all_portfolios = all_portfolios[:MAX_ENTRIES_TO_FETCH]
+    # 5. Records past MAX_ENTRIES_TO_FETCH were skipped above
+    if collected > MAX_ENTRIES_TO_FETCH:
+        logging.warning(f"Collected {collected} portfolios, exceeding limit. Truncated to {MAX_ENTRIES_TO_FETCH}.")
+        collected = MAX_ENTRIES_TO_FETCH
 
-    # 6. Deduplicate based on 'id'
-    if all_portfolios and isinstance(all_portfolios[0], dict) and 'id' in all_portfolios[0]:
-        seen_ids = set()
-        unique_portfolios = []
-        duplicates_found = 0
-        for portfolio in all_portfolios:
-            portfolio_id = portfolio.get('id')
-            if portfolio_id is not None:
-                if portfolio_id not in seen_ids:
-                    seen_ids.add(portfolio_id)
-                    unique_portfolios.append(portfolio)
-                else:
-                    duplicates_found += 1
-            else:
-                unique_portfolios.append(portfolio)
-
-        if duplicates_found > 0:
-            logging.info(f"Removed {duplicates_found} duplicate portfolios based on 'id'.")
-        all_portfolios = unique_portfolios
-        logging.info(f"Total unique portfolios after deduplication: {len(all_portfolios)}")
-    else:
-        logging.info("Could not perform deduplication: 'id' field not found or no portfolios fetched.")
+    # 6. Assemble the unique portfolios
+    all_portfolios = list(by_id.values()) + no_id
+    duplicates_found = collected - len(all_portfolios)
+    if duplicates_found > 0:
+        logging.info(f"Removed {duplicates_found} duplicate portfolios based on 'id'.")
+    logging.info(f"Total unique portfolios after deduplication: {len(all_portfolios)}")
 
     return all_portfolios
 
@@ -133,8 +148,16 @@ def save_data_sync(data, output_file_path):
         return True
 
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Stream one record per line through a 1 MiB buffer: peak memory is one serialized record,
+        # not the whole payload, and the buffer coalesces the small writes
+        with open(output_file_path, 'wb', buffering=1 << 20) as f:
+            f.write(b"[")
+            separator = b"\n"
+            for record in data:
+                f.write(separator)
+                f.write(orjson.dumps(record))
+                separator = b",\n"
+            f.write(b"\n]\n")
         logging.info(f"Successfully saved {len(data)} portfolios to {output_file_path}")
         return True
     except Exception as e:
@@ -148,7 +171,8 @@ async def main():
 
     success = False
     if collected_portfolios is not None:
-        success = save_data_sync(collected_portfolios, OUTPUT_JSON_FILE)
+        # Serialize in a worker thread so the event loop isn't blocked while writing
+        success = await asyncio.to_thread(save_data_sync, collected_portfolios, OUTPUT_JSON_FILE)
     else:
         logging.error("Portfolio fetching process failed overall. No data saved.")
 
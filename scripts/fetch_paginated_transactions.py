@@ -1,4 +1,4 @@
-import json
+import orjson
 import logging
 import math
 import asyncio
@@ -18,7 +18,9 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 OUTPUT_JSON_FILE = "all_transactions.json"
 FETCHED_IDS_FILE = "fetched_transaction_ids.txt" # File to store processed IDs
 PAGE_SIZE = 500 # How many transactions to fetch per API call (adjust based on testing)
-# Concurrency limit is managed within the client via Semaphore
+MAX_INFLIGHT = 16 # Max page requests this script has in flight at once (the client may cap it further)
+_inflight = asyncio.Semaphore(MAX_INFLIGHT)
+_fetched_ids_lock = asyncio.Lock() # Guards the fetched IDs set and file across concurrent page tasks
 
 # --- Persistence Functions ---
 
@@ -36,18 +38,44 @@ def load_fetched_ids(file_path: str) -> set:
         logging.error(f"Error loading fetched IDs from '{file_path}': {e}. Starting fresh.", exc_info=True)
         return set() # Start fresh on error
 
-def append_fetched_id(file_path: str, txn_id: str):
-    """Appends a successfully fetched transaction ID to the file."""
+def append_fetched_ids(file_path: str, txn_ids: list):
+    """Appends a page's newly fetched transaction IDs to the file in a single write."""
     try:
-        # Use append mode 'a'
-        with open(file_path, 'a', encoding='utf-8') as f:
-            f.write(f"{txn_id}\n")
+        # Use append mode 'a'; one open and one write per page instead of per ID
+        with open(file_path, 'a', encoding='utf-8', buffering=1 << 16) as f:
+            f.write("\n".join(txn_ids) + "\n")
     except Exception as e:
         # Log error but continue processing if possible
-        logging.error(f"Error appending ID '{txn_id}' to '{file_path}': {e}", exc_info=True)
+        logging.error(f"Error appending {len(txn_ids)} IDs to '{file_path}': {e}", exc_info=True)
 
 # --- Modified Fetch Function ---
 
+async def store_transaction_page(response_data, skip: int, fetched_ids: set, fetched_ids_file_path: str) -> list:
+    """
+    Validates a page response and appends its new transaction IDs to the tracking file.
+    Returns the full list of transactions from the page (empty on a bad response).
+    """
+    if not (response_data and isinstance(response_data.get('value'), list)):
+        logging.error(f"Failed to fetch or parse page: skip={skip}. Response: {response_data}")
+        return [] # Return empty list on page error
+    page_transactions = response_data['value']
+    logging.info(f"Successfully fetched page: skip={skip}, count={len(page_transactions)}")
+
+    # Process IDs for persistence: valid IDs not already processed in this run or previous runs.
+    # IDs are compared as strings, the form they are stored in on disk; dict.fromkeys also drops
+    # repeats within the page while keeping their order. The lock keeps the check/update of the
+    # shared set and the file append together while the write runs in a worker thread (off the event loop)
+    async with _fetched_ids_lock:
+        new_ids = list(dict.fromkeys(
+            txn_id for txn in page_transactions
+            if (txn_id := txn.get('id')) and (txn_id := str(txn_id)) not in fetched_ids))
+        if new_ids:
+            fetched_ids.update(new_ids) # Add to in-memory set for this run
+            await asyncio.to_thread(append_fetched_ids, fetched_ids_file_path, new_ids)
+            logging.debug(f"Appended {len(new_ids)} new transaction IDs from page skip={skip} to '{fetched_ids_file_path}'.")
+
+    return page_transactions # Return the full page content
+
 async def fetch_transaction_page(skip: int, top: int, fetched_ids: set, fetched_ids_file_path: str) -> list:
     """
     Fetches a single page of transactions asynchronously.
@@ -56,29 +84,9 @@ async def fetch_transaction_page(skip: int, top: int, fetched_ids: set, fetched_
     """
     logging.debug(f"Requesting transactions page: skip={skip}, top={top}")
     try:
-        response_data = await wealtharc_client.get_transactions(top=top, skip=skip)
-        page_transactions = []
-        if response_data and isinstance(response_data.get('value'), list):
-            page_transactions = response_data['value']
-            logging.info(f"Successfully fetched page: skip={skip}, count={len(page_transactions)}")
-
-            # Process IDs for persistence
-            new_ids_on_page = 0
-            for txn in page_transactions:
-                txn_id = txn.get('id')
-                # Ensure it's a valid ID and not already processed in this run or previous runs
-                if txn_id and txn_id not in fetched_ids:
-                    append_fetched_id(fetched_ids_file_path, txn_id)
-                    fetched_ids.add(txn_id) # Add to in-memory set for this run
-                    new_ids_on_page += 1
-
-            if new_ids_on_page > 0:
-                 logging.debug(f"Appended {new_ids_on_page} new transaction IDs from page skip={skip} to '{fetched_ids_file_path}'.")
-
-            return page_transactions # Return the full page content
-        else:
-            logging.error(f"Failed to fetch or parse page: skip={skip}. Response: {response_data}")
-            return [] # Return empty list on page error
+        async with _inflight:
+            response_data = await wealtharc_client.get_transactions(top=top, skip=skip)
+        return await store_transaction_page(response_data, skip, fetched_ids, fetched_ids_file_path)
     except Exception as e:
         logging.error(f"Exception fetching page: skip={skip}. Error: {e}", exc_info=True)
         return [] # Return empty list on exception
@@ -93,16 +101,18 @@ async def fetch_all_transactions_concurrently():
     logging.info(f"Starting fetch. Will track new IDs in '{FETCHED_IDS_FILE}'.")
     # --- End Load existing IDs ---
 
-    all_transactions = []
+    by_id = {}
+    no_id = []
     total_count = 0
     num_pages = 0
 
-    # 1. Try to get total count first (remains the same)
-    logging.info("Fetching total transaction count (if available)...")
+    # 1. Fetch the first page together with the total count ($count is returned alongside the data),
+    # saving a separate top=0 round trip before the concurrent fetch can start
+    logging.info("Fetching first transaction page and total count (if available)...")
     try:
-        count_response = await wealtharc_client.get_transactions(top=0, additional_params={"$count": "true"})
-        if count_response and "@odata.count" in count_response:
-            total_count = int(count_response["@odata.count"])
+        first_response = await wealtharc_client.get_transactions(top=PAGE_SIZE, skip=0, additional_params={"$count": "true"})
+        if first_response and "@odata.count" in first_response:
+            total_count = int(first_response["@odata.count"])
             logging.info(f"API reported total transaction count: {total_count}")
             if total_count == 0:
                 logging.info("Total count is 0. No transactions to fetch.")
@@ -123,24 +133,42 @@ async def fetch_all_transactions_concurrently():
         logging.error(f"Error fetching total count: {e}. Aborting fetch.", exc_info=True)
         return None
 
-    # 2. Create tasks for all pages based on the calculated number
+    first_page = await store_transaction_page(first_response, 0, fetched_ids, FETCHED_IDS_FILE)
+
+    # 2. Create tasks for the remaining pages based on the calculated number
     tasks = []
-    logging.info(f"Preparing {num_pages} tasks for concurrent fetching...")
-    for i in range(num_pages):
+    logging.info(f"Preparing {num_pages - 1} tasks for concurrent fetching...")
+    for i in range(1, num_pages):
         skip = i * PAGE_SIZE
         # Pass the loaded IDs set and file path to each task
-        task = fetch_transaction_page(skip=skip, top=PAGE_SIZE, fetched_ids=fetched_ids, fetched_ids_file_path=FETCHED_IDS_FILE)
+        task = asyncio.create_task(fetch_transaction_page(skip=skip, top=PAGE_SIZE, fetched_ids=fetched_ids, fetched_ids_file_path=FETCHED_IDS_FILE))
         tasks.append(task)
 
-    # 3. Run tasks concurrently and gather results (remains the same)
+    # 3. The tasks run concurrently; consume their pages in page order as they complete
     logging.info(f"Starting concurrent fetch of {len(tasks)} transaction pages...")
-    results_list_of_lists = await asyncio.gather(*tasks)
 
-    # 4. Flatten the results and check for errors
+    # 4. Flatten and deduplicate in one pass as each page arrives, releasing the page afterwards:
+    # first record per id (dict keeps insertion order); records without an id are all kept, after them
+    collected = 0
+
+    def add_page(page_result):
+        nonlocal collected
+        collected += len(page_result)
+        for txn in page_result:
+            txn_id = txn.get('id')
+            if txn_id is None:
+                no_id.append(txn)
+            elif txn_id not in by_id:
+                by_id[txn_id] = txn
+
+    add_page(first_page)
+    del first_page
     failed_pages = 0
-    for page_result in results_list_of_lists:
+    for i in range(len(tasks)):
+        page_result = await tasks[i]
+        tasks[i] = None # Drop the finished task and the page it holds
         if page_result is not None: # Check if page fetch returned data (even an empty list is valid)
-            all_transactions.extend(page_result)
+            add_page(page_result)
         else:
              # If fetch_transaction_page returns None on critical error, count failure
              # Note: Current implementation returns [] on error, so this count might be 0
@@ -149,30 +177,14 @@ async def fetch_all_transactions_concurrently():
     if failed_pages > 0:
          logging.warning(f"{failed_pages} page(s) may have failed critically (returned None).")
 
-    logging.info(f"Finished fetching. Total transactions collected: {len(all_transactions)} (Expected based on count: {total_count})")
+    logging.info(f"Finished fetching. Total transactions collected: {collected} (Expected based on count: {total_count})")
 
-    # 5. Deduplicate based on 'id'
-    if all_transactions and isinstance(all_transactions[0], dict) and 'id' in all_transactions[0]:
-        seen_ids = set()
-        unique_transactions = []
-        duplicates_found = 0
-        for txn in all_transactions:
-            txn_id = txn.get('id')
-            if txn_id is not None:
-                if txn_id not in seen_ids:
-                    seen_ids.add(txn_id)
-                    unique_transactions.append(txn)
-                else:
-                    duplicates_found += 1
-            else:
-                unique_transactions.append(txn) # Keep transactions without an ID
-
-        if duplicates_found > 0:
-            logging.info(f"Removed {duplicates_found} duplicate transactions based on 'id'.")
-        all_transactions = unique_transactions
-        logging.info(f"Total unique transactions after deduplication: {len(all_transactions)}")
-    else:
-        logging.warning("Could not perform deduplication: 'id' field not found in first transaction or no transactions fetched.")
+    # 5. Assemble the unique transactions
+    all_transactions = list(by_id.values()) + no_id
+    duplicates_found = collected - len(all_transactions)
+    if duplicates_found > 0:
+        logging.info(f"Removed {duplicates_found} duplicate transactions based on 'id'.")
+    logging.info(f"Total unique transactions after deduplication: {len(all_transactions)}")
 
     return all_transactions
 
@@ -187,8 +199,16 @@ def save_data_sync(data, output_file_path):
         return True # Not an error
 
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Stream one record per line through a 1 MiB buffer: peak memory is one serialized record,
+        # not the whole payload, and the buffer coalesces the small writes
+        with open(output_file_path, 'wb', buffering=1 << 20) as f:
+            f.write(b"[")
+            separator = b"\n"
+            for record in data:
+                f.write(separator)
+                f.write(orjson.dumps(record))
+                separator = b",\n"
+            f.write(b"\n]\n")
         logging.info(f"Successfully saved {len(data)} transactions to {output_file_path}")
         return True
     except Exception as e:
@@ -202,7 +222,8 @@ async def main():
 
     success = False
     if collected_transactions is not None:
-        success = save_data_sync(collected_transactions, OUTPUT_JSON_FILE)
+        # Serialize in a worker thread so the event loop isn't blocked while writing
+        success = await asyncio.to_thread(save_data_sync, collected_transactions, OUTPUT_JSON_FILE)
     else:
         logging.error("Transaction fetching process failed overall. No data saved.")
 
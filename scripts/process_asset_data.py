@@ -1,6 +1,10 @@
-import json
 import logging
+import ijson
+import itertools
+import orjson
+import os
 import re
+import sys
 
 # Configure logging for this script
 logging.basicConfig(
@@ -11,81 +15,172 @@ logging.basicConfig(
 INPUT_JSON_FILE = "all_assets.json" # Changed from INPUT_LOG_FILE
 OUTPUT_JSON_FILE = "filtered_assets.json"
 
+# Raw-bytes prefilters for line-delimited input: a line that lacks either pattern
+# cannot be an Instrument with a non-empty ISIN, so it is skipped without being parsed.
+INSTRUMENT_MARKER = b'#WealthArc.Instrument'
+NON_EMPTY_ISIN_PATTERN = re.compile(rb'"isin"\s*:\s*"[^"]')
+
+ODATA_TYPE_KEY = sys.intern('@odata.type')
+INSTRUMENT_TYPE = sys.intern('#WealthArc.Instrument')
+
+def _stream_items(f, prefix):
+    """Yields items under `prefix` one at a time, closing the file when exhausted."""
+    try:
+        yield from ijson.items(f, prefix, use_float=True)
+    finally:
+        f.close()
+
 def load_json_data(json_file_path):
-    """Loads JSON data directly from a file."""
-    # Removed extra """ here
+    """
+    Streams assets from a JSON file one at a time instead of loading the whole array.
+    Returns an iterator over the assets, or None if the file cannot be opened or has an unexpected shape.
+    """
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # The paginated script saves the list directly, not nested under 'value'
-            if isinstance(data, list):
-                return data
-            # Handle case if it was saved nested (less likely with current fetch script)
-            elif isinstance(data, dict) and 'value' in data and isinstance(data['value'], list):
-                 logging.warning("Loaded data was nested under 'value', using that.")
-                 return data['value']
-            else:
-                logging.error("Loaded JSON is not a list or a dict with a 'value' list.")
-                return None
+        f = open(json_file_path, 'rb')
     except FileNotFoundError:
         logging.error(f"Input JSON file not found: {json_file_path}")
         return None
-    except json.JSONDecodeError as e:
-        logging.error(f"Failed to decode JSON from {json_file_path}: {e}")
-        return None
     except Exception as e:
         logging.error(f"An error occurred reading the JSON file: {e}")
         return None
 
-def process_assets(all_assets_list):
+    # Peek at the first non-whitespace byte to pick the array prefix, then rewind
+    first_byte = f.read(64).lstrip()[:1]
+    f.seek(0)
+    # The paginated script saves the list directly, not nested under 'value'
+    if first_byte == b'[':
+        return _stream_items(f, 'item')
+    # Handle case if it was saved nested (less likely with current fetch script)
+    elif first_byte == b'{':
+        logging.warning("Loaded data is a JSON object, streaming its 'value' list.")
+        return _stream_items(f, 'value.item')
+    f.close()
+    logging.error("Loaded JSON is not a list or a dict with a 'value' list.")
+    return None
+
+def has_one_record_per_line(json_file_path):
     """
-    Filters a list of assets to find Instruments with an ISIN and extracts relevant fields.
+    True for ND-JSON (.jsonl), or for a JSON array saved with one compact record per line
+    ('[', then '{...},' lines, then ']'), as the paginated fetch scripts write it.
+    Indented or single-line arrays return False and are streamed with ijson instead.
     """
-    filtered_instruments = []
-    if not isinstance(all_assets_list, list):
-        logging.error("Invalid input: process_assets expects a list.")
-        return filtered_instruments
-
-    for asset in all_assets_list:
-        # Check if it's an Instrument (dict) and has a non-empty ISIN
-        if (isinstance(asset, dict) and
-            asset.get('@odata.type') == '#WealthArc.Instrument' and
-            asset.get('isin')): # Checks for non-null and non-empty string
+    if json_file_path.endswith('.jsonl'):
+        return True
+    try:
+        with open(json_file_path, 'rb') as f:
+            return f.readline().strip() == b'[' and f.readline().startswith(b'{')
+    except OSError:
+        return False # load_json_data reports the error
 
-            filtered_instruments.append({
-                "id": asset.get('id'),
-                "isin": asset.get('isin'),
-                "name": asset.get('name')
-            })
-        # Optional: Log if it's a CashAccount or Instrument without ISIN?
-        # elif asset.get('@odata.type') == '#WealthArc.CashAccount':
-        #     logging.debug(f"Skipping CashAccount with id {asset.get('id')}")
-        # elif asset.get('@odata.type') == '#WealthArc.Instrument' and not asset.get('isin'):
-        #      logging.debug(f"Skipping Instrument without ISIN: id {asset.get('id')}, name {asset.get('name')}")
+def load_jsonl_instrument_candidates(jsonl_file_path):
+    """
+    Loads line-delimited asset JSON (see has_one_record_per_line), parsing only lines that pass
+    the raw-bytes prefilter. The result still goes through process_assets, which applies the exact filter.
+    """
+    candidates = []
+    try:
+        with open(jsonl_file_path, 'rb') as f:
+            for line in f:
+                if INSTRUMENT_MARKER not in line or not NON_EMPTY_ISIN_PATTERN.search(line):
+                    continue
+                line = line.rstrip()
+                if line.endswith(b','): # Record line inside a JSON array
+                    line = line[:-1]
+                candidates.append(orjson.loads(line))
+        return candidates
+    except FileNotFoundError:
+        logging.error(f"Input JSONL file not found: {jsonl_file_path}")
+        return None
+    except orjson.JSONDecodeError as e:
+        logging.error(f"Failed to decode JSON line from {jsonl_file_path}: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"An error occurred reading the JSONL file: {e}")
+        return None
 
+def process_assets(all_assets_list):
+    """
+    Filters an iterable of assets to find Instruments with an ISIN and yields their relevant fields.
+    """
+    # Validate the element type once up front instead of on every asset
+    assets = iter(all_assets_list)
+    first_asset = next(assets, None)
+    if first_asset is None:
+        return
+    if not isinstance(first_asset, dict):
+        logging.error("Invalid input: process_assets expects JSON objects as assets.")
+        return
 
-    logging.info(f"Found {len(filtered_instruments)} instruments with ISINs.")
-    return filtered_instruments
+    try:
+        for asset in itertools.chain((first_asset,), assets):
+            # Check if it's an Instrument and has a non-empty ISIN (non-null and non-empty string).
+            # Values parsed from JSON are not interned, so compare with == (which still
+            # short-circuits on identity) rather than `is`.
+            if asset.get(ODATA_TYPE_KEY) == INSTRUMENT_TYPE and (isin := asset.get('isin')):
+                yield {
+                    "id": asset.get('id'),
+                    "isin": isin,
+                    "name": asset.get('name')
+                }
+            # Optional: Log if it's a CashAccount or Instrument without ISIN?
+            # elif asset.get('@odata.type') == '#WealthArc.CashAccount':
+            #     logging.debug(f"Skipping CashAccount with id {asset.get('id')}")
+            # elif asset.get('@odata.type') == '#WealthArc.Instrument' and not asset.get('isin'):
+            #      logging.debug(f"Skipping Instrument without ISIN: id {asset.get('id')}, name {asset.get('name')}")
+    except AttributeError: # A later element is not a dict; raised so save_filtered_data discards its output
+        raise TypeError("Invalid input: process_assets expects JSON objects as assets.") from None
 
 def save_filtered_data(data, output_file_path):
-    """Saves the filtered data to a JSON file."""
+    """
+    Streams filtered records to a JSON array file, one orjson-encoded record at a time.
+    Records go to a temp file next to the output, which replaces it only once the input has been
+    read to the end, so a malformed input never leaves a truncated array in place of the old file.
+    Returns the number of records written (0, with no file created, if there are none),
+    or None if the input could not be read or the output could not be written.
+    """
+    temp_path = f"{output_file_path}.{os.getpid()}.tmp" # Same directory, so os.replace is atomic
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        records = iter(data)
+        first_record = next(records, None)
+        if first_record is None:
+            return 0
+        with open(temp_path, 'wb') as f:
+            # Same layout as orjson.dumps(list, option=OPT_INDENT_2), with records nested one level
+            f.write(b'[\n  ' + orjson.dumps(first_record, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n  '))
+            count = 1
+            for record in records:
+                f.write(b',\n  ' + orjson.dumps(record, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n  '))
+                count += 1
+            f.write(b'\n]')
+        os.replace(temp_path, output_file_path)
         logging.info(f"Successfully saved filtered instruments data to {output_file_path}")
+        return count
+    except (ijson.JSONError, orjson.JSONDecodeError, TypeError) as e:
+        logging.error(f"Failed to read input assets, leaving {output_file_path} unchanged: {e}")
     except Exception as e:
         logging.error(f"Failed to save data to {output_file_path}: {e}")
+    finally:
+        if os.path.exists(temp_path): # Only still there if writing did not complete
+            os.remove(temp_path)
+    return None
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        INPUT_JSON_FILE = sys.argv[1] # Optional input path, e.g. an ND-JSON .jsonl file
     logging.info(f"Starting processing of {INPUT_JSON_FILE}...")
-    all_assets = load_json_data(INPUT_JSON_FILE) # Load directly from JSON
+    if has_one_record_per_line(INPUT_JSON_FILE):
+        all_assets = load_jsonl_instrument_candidates(INPUT_JSON_FILE) # Prefiltered line-by-line load
+    else:
+        all_assets = load_json_data(INPUT_JSON_FILE) # Stream the array with ijson
 
     if all_assets is not None: # Check if loading was successful
-        filtered_data = process_assets(all_assets)
-        if filtered_data:
-            save_filtered_data(filtered_data, OUTPUT_JSON_FILE)
+        saved_count = save_filtered_data(process_assets(all_assets), OUTPUT_JSON_FILE)
+        if saved_count is None:
+            logging.error(f"Failed to process assets from {INPUT_JSON_FILE}.")
         else:
-            logging.warning("No instruments with ISINs found or extracted.")
+            logging.info(f"Found {saved_count} instruments with ISINs.")
+            if not saved_count:
+                logging.warning("No instruments with ISINs found or extracted.")
     else:
         logging.error("Failed to load asset data from JSON file.")
 
@@ -1,7 +1,8 @@
 # --- Pydantic Models for PDF Content Components ---
 
 from typing import List, Dict, Any, Optional, Union, Literal
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter
 from enum import Enum
 
 class TextAlignment(str, Enum):
@@ -13,7 +14,7 @@ class TextAlignment(str, Enum):
 class TextComponent(BaseModel):
     """Represents a block of text content for the PDF."""
     type: Literal["text"] = "text" # Discriminator field
-    content: str # The actual text string, can include markdown or HTML depending on renderer capabilities
+    content: str # The actual text string; HTML special characters are escaped by the renderer
     style: Optional[str] = None # e.g., 'heading1', 'body', 'bold', 'italic' - maps to PDF styles
     alignment: Optional[TextAlignment] = None # Text alignment within the block
     space_before: Optional[float] = None # Vertical space before this component (in points)
@@ -51,7 +52,20 @@ class PageBreakComponent(BaseModel):
 # Union of all possible content components
 PDFContentComponent = Union[TextComponent, TableComponent, ImageComponent, PageBreakComponent]
 
+# Validates a whole list of raw component dicts in one call into pydantic-core,
+# instead of validating each component separately from Python.
+PDFDocumentAdapter = TypeAdapter(List[PDFContentComponent])
+
 class PDFDocument(BaseModel):
     """Represents the structure of the entire PDF document as a list of components."""
     components: List[PDFContentComponent] # Ordered list of components to render
     # Add document-level settings later (e.g., margins, headers/footers, title)
+
+    @classmethod
+    def from_list(cls, items: List[Dict[str, Any]]) -> "PDFDocument":
+        """Builds a PDFDocument from a list of raw component dicts using batch validation."""
+        return cls(components=PDFDocumentAdapter.validate_python(items))
+
+    def to_json_bytes(self) -> bytes:
+        """Serializes the document to JSON bytes via orjson (for caching/handoff between pipeline steps)."""
+        return orjson.dumps(self.model_dump(mode='json'))
@@ -1,99 +1,227 @@
 # --- PDF Report Generator ---
 
-from typing import List, Dict, Any, Optional
-from weasyprint import HTML
-from .components import PDFDocument, PDFContentComponent, TextComponent, TableComponent, ImageComponent, PageBreakComponent
-
-def render_component_to_html(component: PDFContentComponent) -> str:
-    """Renders a single PDF content component into HTML."""
-    if isinstance(component, TextComponent):
-        # Simple text rendering, could be extended to handle markdown/styles
-        style = f"text-align: {component.alignment.value};" if component.alignment else ""
-        style += f"margin-top: {component.space_before}pt;" if component.space_before is not None else ""
-        style += f"margin-bottom: {component.space_after}pt;" if component.space_after is not None else ""
-        # Basic styling based on component.style
-        if component.style == 'heading1':
-            return f"<h1 style='{style}'>{component.content}</h1>"
-        elif component.style == 'body':
-             return f"<p style='{style}'>{component.content}</p>"
-        elif component.style == 'bold':
-             return f"<strong style='{style}'>{component.content}</strong>"
-        elif component.style == 'italic':
-             return f"<em style='{style}'>{component.content}</em>"
-        else: # Default paragraph
-            return f"<p style='{style}'>{component.content}</p>"
-
-    elif isinstance(component, TableComponent):
-        html = f"<table>"
-        if component.title:
-            html += f"<caption>{component.title}</caption>"
-        html += "<thead><tr>"
-        for col in component.columns:
-            col_style = f"text-align: {col.alignment.value};" if col.alignment else ""
-            html += f"<th style='{col_style}'>{col.header}</th>"
-        html += "</tr></thead>"
-        html += "<tbody>"
-        for row in component.data:
-            html += "<tr>"
-            for col in component.columns:
-                cell_data = row.get(col.data_key, "")
-                cell_style = f"text-align: {col.alignment.value};" if col.alignment else ""
-                html += f"<td style='{cell_style}'>{cell_data}</td>"
-            html += "</tr>"
-        html += "</tbody></table>"
-        # Add basic table styling (borders, padding) via CSS later
-        return html
-
-    elif isinstance(component, ImageComponent):
-        style = ""
-        if component.width:
-            style += f"width: {component.width}pt;"
-        if component.height:
-            style += f"height: {component.height}pt;"
-        if component.alignment == TextAlignment.CENTER:
-             style += "display: block; margin-left: auto; margin-right: auto;"
-        # Add other alignments later
-        img_tag = f"<img src='file://{component.image_path}' style='{style}'/>"
-        if component.caption:
-            return f"<figure>{img_tag}<figcaption>{component.caption}</figcaption></figure>"
-        return img_tag
-
-    elif isinstance(component, PageBreakComponent):
-        return "<div style='page-break-after: always;'></div>"
-
-    return "" # Handle unknown component types
+import os
+import base64
+import mimetypes
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence
+from markupsafe import escape
+from weasyprint import HTML, default_url_fetcher
+from .components import (PDFDocument, PDFContentComponent, TextAlignment, TextComponent, TableColumn, TableComponent,
+                         ImageComponent, PageBreakComponent)
 
+# Opening/closing tags for each TextComponent.style; unknown styles fall back to a paragraph
+_STYLE_TAGS = {
+    'heading1': ("<h1", "</h1>"),
+    'body': ("<p", "</p>"),
+    'bold': ("<strong", "</strong>"),
+    'italic': ("<em", "</em>"),
+}
+_DEFAULT_STYLE_TAGS = ("<p", "</p>")
 
-def generate_pdf(pdf_document: PDFDocument, output_path: str):
-    """
-    Generates a PDF file from a PDFDocument object using WeasyPrint.
-    """
-    html_content = "<!DOCTYPE html><html><head><title>Financial Report</title>"
-    # Add basic CSS for layout, margins, fonts here
-    html_content += """
+# Enum member -> CSS value, resolved once at import instead of via `.value` on every render
+_ALIGN_VALUE = {alignment: alignment.value for alignment in TextAlignment}
+
+# Pre-baked inline style fragments/cell tags per alignment, so rendering does a dict lookup instead of formatting
+_ALIGN_STYLES = {alignment: f"text-align: {value};" for alignment, value in _ALIGN_VALUE.items()}
+_TH_OPEN = {alignment: f"<th style='{style}'>" for alignment, style in _ALIGN_STYLES.items()}
+_TD_OPEN = {alignment: f"<td style='{style}'>" for alignment, style in _ALIGN_STYLES.items()}
+_IMAGE_ALIGN_STYLES = {TextAlignment.CENTER: "display: block; margin-left: auto; margin-right: auto;"} # Add other alignments later
+
+_PAGE_BREAK_HTML = "<div style='page-break-after: always;'></div>"
+
+# Static document head (basic CSS for layout, margins, fonts) shared by every report
+_HTML_PRELUDE = """<!DOCTYPE html><html><head><title>Financial Report</title>
     <style>
         body { font-family: sans-serif; margin: 1in; }
         table { border-collapse: collapse; width: 100%; margin-bottom: 1em; }
         th, td { border: 1px solid #ddd; padding: 8px; }
         th { text-align: left; }
         img { max-width: 100%; } /* Ensure images don't overflow */
-    </style>"""
-    html_content += "</head><body>"
+    </style></head><body>"""
+_HTML_POSTLUDE = "</body></html>"
 
-    for component in pdf_document.components:
-        html_content += render_component_to_html(component)
 
-    html_content += "</body></html>"
+def _render_text(component: TextComponent, out: List[str]) -> None:
+    # Simple text rendering, could be extended to handle markdown/styles
+    style = _ALIGN_STYLES.get(component.alignment, "")
+    if component.space_before is not None:
+        style += f"margin-top: {component.space_before}pt;"
+    if component.space_after is not None:
+        style += f"margin-bottom: {component.space_after}pt;"
+    open_tag, close_tag = _STYLE_TAGS.get(component.style, _DEFAULT_STYLE_TAGS)
+    out.append(f"{open_tag} style='{style}'>{escape(component.content)}{close_tag}")
+
+
+def _render_table_rows(cells: List[tuple], data: List[Dict[str, Any]], out: List[str]) -> None:
+    """Appends one <tr> per row; `cells` holds (opening <td> tag, data key) pairs per column."""
+    # Hot loop for large tables: bind method lookups to locals once per table/row
+    append = out.append
+    _escape = escape # C-accelerated HTML escaping of cell data
+    for row in data:
+        get = row.get
+        append("<tr>")
+        for cell_open, key in cells:
+            append(cell_open)
+            append(_escape(get(key, "")))
+            append("</td>")
+        append("</tr>")
+
+
+def _render_table(component: TableComponent, out: List[str]) -> None:
+    out.append("<table>")
+    if component.title:
+        out.append(f"<caption>{escape(component.title)}</caption>")
+    # Pre-render per-column opening tags once instead of per cell
+    columns = component.columns
+    header_open = [_TH_OPEN.get(col.alignment, "<th>") for col in columns]
+    cell_open = [_TD_OPEN.get(col.alignment, "<td>") for col in columns]
+    out.append("<thead><tr>")
+    for i, col in enumerate(columns):
+        out.append(header_open[i])
+        out.append(escape(col.header))
+        out.append("</th>")
+    out.append("</tr></thead><tbody>")
+    _render_table_rows(list(zip(cell_open, [col.data_key for col in columns])), component.data, out)
+    out.append("</tbody></table>")
+    # Add basic table styling (borders, padding) via CSS later
+
+
+INLINE_IMAGE_MAX_BYTES = 2 * 1024 * 1024 # Larger images are left to the prefetching url_fetcher
+
+
+@lru_cache(maxsize=128)
+def _encode_image_data_uri(image_path: str, mtime_ns: int, size: int) -> str:
+    # mtime_ns/size are part of the cache key so an updated chart is re-encoded
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    mime_type = mimetypes.guess_type(image_path)[0] or 'image/png'
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def _image_src(image_path: str) -> str:
+    """Returns an inline base64 data URI for small readable images, otherwise a file:// URL."""
+    try:
+        stat = os.stat(image_path)
+        if stat.st_size <= INLINE_IMAGE_MAX_BYTES:
+            return _encode_image_data_uri(image_path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass # Missing/unreadable files keep the file:// URL so WeasyPrint reports them as before
+    return f"file://{image_path}"
+
+
+def _render_image(component: ImageComponent, out: List[str]) -> None:
+    style = ""
+    if component.width:
+        style += f"width: {component.width}pt;"
+    if component.height:
+        style += f"height: {component.height}pt;"
+    style += _IMAGE_ALIGN_STYLES.get(component.alignment, "")
+    img_tag = f"<img src='{_image_src(component.image_path)}' style='{style}'/>"
+    if component.caption:
+        out.append(f"<figure>{img_tag}<figcaption>{escape(component.caption)}</figcaption></figure>")
+    else:
+        out.append(img_tag)
+
+
+def _render_page_break(component: PageBreakComponent, out: List[str]) -> None:
+    out.append(_PAGE_BREAK_HTML)
+
+
+def _render_unknown(component: Any, out: List[str]) -> None:
+    pass # Unknown component types render nothing
+
 
-    # Generate PDF using WeasyPrint
-    HTML(string=html_content).write_pdf(output_path)
+# Component type -> renderer, so dispatch is a single dict lookup per component
+_RENDERERS = {
+    TextComponent: _render_text,
+    TableComponent: _render_table,
+    ImageComponent: _render_image,
+    PageBreakComponent: _render_page_break,
+}
+
+
+def render_component_to_html(component: PDFContentComponent, out: List[str]) -> None:
+    """Renders a single PDF content component into HTML, appending fragments to `out`."""
+    _RENDERERS.get(type(component), _render_unknown)(component, out)
+
+
+IMAGE_PREFETCH_WORKERS = 8 # Max threads used to read image files ahead of rendering
+
+
+def _read_image_file(image_path: str) -> tuple:
+    try:
+        with open(image_path, 'rb') as f:
+            return image_path, f.read()
+    except OSError:
+        return image_path, None # Leave missing files to WeasyPrint's default fetcher/error handling
+
+
+def _is_large_image(image_path: str) -> bool:
+    try:
+        return os.path.getsize(image_path) > INLINE_IMAGE_MAX_BYTES
+    except OSError:
+        return False
+
+
+def _prefetch_images(pdf_document: PDFDocument) -> Dict[str, bytes]:
+    """Reads image files too large to inline concurrently, keyed by their file:// URL."""
+    image_paths = {c.image_path for c in pdf_document.components
+                   if isinstance(c, ImageComponent) and _is_large_image(c.image_path)}
+    if not image_paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(IMAGE_PREFETCH_WORKERS, len(image_paths))) as executor:
+        results = list(executor.map(_read_image_file, image_paths))
+    return {f"file://{path}": data for path, data in results if data is not None}
+
+
+def _make_url_fetcher(prefetched: Dict[str, bytes]):
+    """Returns a WeasyPrint url_fetcher serving prefetched images from memory, falling back to the default fetcher."""
+    def url_fetcher(url: str, *args, **kwargs):
+        data = prefetched.get(url)
+        if data is None:
+            return default_url_fetcher(url, *args, **kwargs)
+        return {'string': data, 'mime_type': mimetypes.guess_type(url)[0], 'redirected_url': url}
+    return url_fetcher
+
+
+def generate_pdf(pdf_document: PDFDocument, output_path: str):
+    """
+    Generates a PDF file from a PDFDocument object using WeasyPrint.
+    Small images are inlined as data URIs; larger ones are read concurrently before rendering.
+    """
+    # Collect HTML fragments in a list and join once, instead of repeated string concatenation
+    parts = [_HTML_PRELUDE]
+    for component in pdf_document.components:
+        render_component_to_html(component, parts)
+    parts.append(_HTML_POSTLUDE)
+
+    # Generate PDF using WeasyPrint. Lay out first, then drop the HTML fragments and source
+    # before writing, so the HTML and the serialized PDF are never held in memory together.
+    url_fetcher = _make_url_fetcher(_prefetch_images(pdf_document))
+    html = HTML(string="".join(parts), url_fetcher=url_fetcher)
+    del parts
+    rendered_document = html.render()
+    del html
+    with open(output_path, 'wb') as f:
+        rendered_document.write_pdf(target=f)
 
     print(f"PDF generated successfully at {output_path}")
 
+
+def generate_pdfs(pdf_documents: Sequence[PDFDocument], output_paths: Sequence[str], max_workers: Optional[int] = None):
+    """
+    Generates several PDF files in parallel, one WeasyPrint render per worker process.
+    """
+    if len(pdf_documents) != len(output_paths):
+        raise ValueError("pdf_documents and output_paths must have the same length.")
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        # Consume the iterator so worker exceptions are raised here
+        list(executor.map(generate_pdf, pdf_documents, output_paths))
+
 # Example usage (can be removed or commented out for library use)
 if __name__ == "__main__":
-    from .components import TextAlignment, TextComponent, TableColumn, TableComponent, ImageComponent, PageBreakComponent, PDFDocument
-
     # Create a dummy PDFDocument
     dummy_document = PDFDocument(
         components=[
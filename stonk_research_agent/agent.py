@@ -180,7 +180,7 @@ def find_tool_output(items: list[Any], tool_name: str) -> Optional[str]:
             item_tool_name = getattr(item, 'tool_name', None)
             # Specific check for run_full_research, as its name might be different in older SDK versions
             is_research_tool = (item_tool_name == tool_name) or \
-                               (tool_name == "run_full_research" and isinstance(getattr(item, 'output', None), str) and getattr(item, 'output', '').strip().startswith('{\n  "report": ['))
+                               (tool_name == "run_full_research" and isinstance(getattr(item, 'output', None), str) and getattr(item, 'output', '').lstrip().startswith(('{"report":', '{\n  "report": [')))
 
             if is_research_tool:
                 output_obj = getattr(item, 'output', None)
@@ -201,18 +201,36 @@ def find_tool_output(items: list[Any], tool_name: str) -> Optional[str]:
     return None
 
 
+def index_tool_outputs(items: list[Any]) -> Dict[str, str]:
+    """Maps tool name -> output string in a single pass over the agent results (first output per tool wins)."""
+    output_item_type = ToolCallOutputItem if ToolCallOutputItem else FunctionToolResult
+    outputs: Dict[str, str] = {}
+    if not output_item_type:
+        return outputs
+    for item in items:
+        if isinstance(item, output_item_type):
+            item_tool_name = getattr(item, 'tool_name', None)
+            output_obj = getattr(item, 'output', None)
+            if item_tool_name and isinstance(output_obj, str):
+                outputs.setdefault(item_tool_name, output_obj)
+    return outputs
+
+
 # --- Main Execution Logic (Refactored for Manual Merging) ---
-async def main(user_query: str):
+DEFAULT_OUTPUT_FILENAME = "stonk_research_output.json" # Read by run_dashboard_agent.py
+
+async def main(user_query: str, output_filename: Optional[str] = DEFAULT_OUTPUT_FILENAME):
     """
     Runs the Stonk Research Agent, gets WebAnalysisOutput, finds run_full_research output,
-    merges them into FullResearchReport, and saves JSON.
+    merges them into FullResearchReport, and saves JSON to `output_filename`.
+    Pass output_filename=None to skip the file (run_pipeline.py does, since concurrent
+    queries would overwrite each other's file; it uses the returned run result instead).
     """
     if not all([stonk_research_agent, FullResearchReport, SymbolResearchData, WebSearchOutput, WebAnalysisOutput, ValidationError, Field, HttpUrl]):
         print("Agent or Pydantic models failed to initialize. Exiting.", file=sys.stderr)
         return
 
     print(f"\n--- Running Stonk Research Agent for query: '{user_query}' ---", file=sys.stderr)
-    output_filename = "stonk_research_output.json"
     final_report_obj: Optional[FullResearchReport] = None
     web_analysis_obj: Optional[WebAnalysisOutput] = None
     final_text_output: Optional[str] = None
@@ -232,14 +250,21 @@ async def main(user_query: str):
             # Try to get raw text output as a fallback for supplementary info
             final_text_output = agent_run_result.final_output if isinstance(agent_run_result.final_output, str) else "Error: Agent output was not text or valid structure."
 
-        # 2. Find the output from the 'run_full_research' tool call
-        research_json_str = find_tool_output(agent_run_result.new_items, "run_full_research")
+        # 2. Find the output from the 'run_full_research' tool call. Tool outputs are indexed by name once and
+        # kept on the result, so the pipeline can look them up instead of rescanning new_items
+        tool_outputs_by_name = index_tool_outputs(agent_run_result.new_items)
+        research_json_str = tool_outputs_by_name.get("run_full_research")
+        if research_json_str is None: # Unnamed/non-string outputs: fall back to the full search
+            research_json_str = find_tool_output(agent_run_result.new_items, "run_full_research")
+            if research_json_str is not None:
+                tool_outputs_by_name["run_full_research"] = research_json_str
+        agent_run_result.tool_outputs_by_name = tool_outputs_by_name
 
         # 3. Load or initialize the FullResearchReport object from the tool output
         if research_json_str:
             try:
-                parsed_data = json.loads(research_json_str)
-                final_report_obj = FullResearchReport(**parsed_data) # This is the raw_research_report
+                # Parse and validate in one pass (pydantic-core) instead of json.loads + FullResearchReport(**data)
+                final_report_obj = FullResearchReport.model_validate_json(research_json_str) # This is the raw_research_report
                 print("DEBUG: Successfully loaded base research data from 'run_full_research' tool output.", file=sys.stderr)
                 if not final_report_obj.report:
                      print("WARN: Base report has empty 'report' list. Initializing.", file=sys.stderr)
@@ -281,19 +306,13 @@ async def main(user_query: str):
             # Assume the analysis corresponds to the first symbol in the report
             target_symbol_data = final_report_obj.report[0]
 
-            # Create a WebSearchOutput object from the WebAnalysisOutput data
-            # Convert key_source_urls from List[str] back to List[HttpUrl] for the final report structure
-            try:
-                key_urls_as_httpurl = [HttpUrl(url_str) for url_str in web_analysis_obj.key_source_urls]
-            except ValidationError as url_val_error:
-                 print(f"WARN: Error converting key_source_urls back to HttpUrl during merge: {url_val_error}. Using empty list.", file=sys.stderr)
-                 key_urls_as_httpurl = []
-
-            merged_web_search = WebSearchOutput(
+            # Create a WebSearchOutput object from the WebAnalysisOutput data.
+            # Every field is already validated (key_source_urls by WebAnalysisOutput's URL check), so skip re-validation
+            merged_web_search = WebSearchOutput.model_construct(
                  query=None, # WebAnalysisOutput doesn't contain the query, set to None
                  overall_summary=web_analysis_obj.overall_summary,
                  relevant_news=web_analysis_obj.relevant_news,
-                 key_source_urls=key_urls_as_httpurl, # Use the converted list
+                 key_source_urls=list(web_analysis_obj.key_source_urls), # Plain strings, no HttpUrl round-trip
                  error=web_analysis_obj.error
             )
             target_symbol_data.web_search = merged_web_search
@@ -305,9 +324,11 @@ async def main(user_query: str):
              print("WARN: WebAnalysisOutput was missing or invalid, updated report with error state.", file=sys.stderr)
 
         # 5. Save Final Merged JSON
-        if final_report_obj:
+        if final_report_obj and not output_filename:
+            print("DEBUG: No output file requested, merged report not saved.", file=sys.stderr)
+        elif final_report_obj:
             try:
-                json_output = final_report_obj.model_dump_json(indent=2)
+                json_output = final_report_obj.model_dump_json()
                 # Removed: print(json_output, file=sys.stdout) - run_pipeline.py handles final stdout
                 # Optionally, still save to file for debugging or other uses
                 with open(output_filename, "w") as f:
@@ -342,6 +363,8 @@ async def main(user_query: str):
         print(f"\n--- Agent Run Error ---", file=sys.stderr)
         print(f"An unexpected error occurred during agent run or merging: {e}", file=sys.stderr)
         # Attempt to save error report
+        if not output_filename:
+            return
         try:
             error_msg = f"Agent Run/Merge Error: {e}"
             error_report = FullResearchReport(report=[SymbolResearchData(symbol="UNKNOWN (Run/Merge Error)", web_search=WebSearchOutput(error=error_msg))])
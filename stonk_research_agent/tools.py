@@ -317,7 +317,7 @@ class WebSearchOutput(BaseModel):
     overall_summary: Optional[str] = Field(None, description="Synthesized summary, now potentially derived from parsing agent output.") # Modified description
     # Removed overall sentiment fields, now per-article
     relevant_news: List[WebSearchNewsArticle] = Field(default_factory=list, description="List of relevant news articles analyzed for stock price impact.")
-    key_source_urls: List[HttpUrl] = Field(default_factory=list, description="List of important source URLs.") # Keep this for quick reference
+    key_source_urls: List[str] = Field(default_factory=list, description="List of important source URLs.") # Already validated by WebAnalysisOutput, kept as plain strings
     error: Optional[str] = None # To capture potential errors during web search/parsing
 
 # NEW: Simplified model for agent's direct output
@@ -490,7 +490,7 @@ def run_full_research(symbols: List[str], news_count: int, fred_series: Optional
         report_data.append(symbol_data)
 
     final_report = FullResearchReport(report=report_data)
-    json_output = final_report.model_dump_json(indent=2)
+    json_output = final_report.model_dump_json() # Compact: this is returned to the LLM, so whitespace costs tokens
     print(f"DEBUG: run_full_research final JSON output (length: {len(json_output)}):\n{json_output[:500]}...", file=sys.stderr) # Redirect to stderr
     return json_output
 
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.analyze_wealtharc_data import detect_data_type, extract_columns, markdown_table
+
+
+def _frames():
+    """Small frames covering the column kinds the report renders."""
+    amounts = pd.DataFrame({"type": ["a", "b", "a"], "amount": [100.5, 2.25, 1000.0]})
+    summary = amounts.groupby("type")["amount"].agg(["count", "sum", "mean"])
+    return [
+        summary, # All-numeric: tabulate upcasts the int column to float
+        summary.reset_index(), # Mixed text/int/float columns
+        pd.DataFrame({
+            "i": [1, 20, 300],
+            "f": [1.5, np.nan, 1e7],
+            "b": [True, False, True],
+            "n": pd.array([1, None, 3], dtype="Int64"),
+            "s": ["x", None, "zz"],
+            "g": [1e-7, 2.0, 3.25],
+        }),
+        pd.DataFrame({"f": [1.5, 2.0], "n": pd.array([1.5, None], dtype="Float64")}),
+        pd.Series([0.1, 22.333, 4], name="v"),
+        pd.DataFrame({"ab": [], "c": []}),
+    ]
+
+
+@pytest.mark.parametrize("frame", _frames())
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"floatfmt": ".2f"},
+    {"index": False},
+    {"index": False, "floatfmt": ".2f"},
+    {"numalign": "left", "stralign": "left"},
+])
+def test_markdown_table_matches_to_markdown(frame, kwargs):
+    pytest.importorskip("tabulate") # DataFrame.to_markdown() goes through tabulate, which markdown_table mirrors
+    assert markdown_table(frame, **kwargs) == frame.to_markdown(**kwargs)
+
+
+def test_markdown_table_aligns_floats_on_the_decimal_point():
+    amounts = pd.DataFrame({"type": ["x", "y"], "sum": [102.75, 1000.0], "mean": [51.375, 1000.0]})
+    rows = markdown_table(amounts, index=False).splitlines()[2:]
+    assert rows == [
+        "| x      |  102.75 |   51.375 |",
+        "| y      | 1000    | 1000     |",
+    ]
+
+
+RECORDS = [
+    {"id": 1, "type": "Buy", "amount": 100.5, "flag": True, "note": "a", "extra": 1,
+     "asset": {"name": "A", "isin": "X1", "currency": {"code": "USD"}}},
+    {"id": 2, "type": None, "amount": 3, "flag": False, "note": 1,
+     "asset": {"name": None, "currency": None}},
+    {"id": 3, "amount": None, "note": None, "asset": None, "status": "late"},
+    {"id": 4, "amount": 2.5, "asset": {"isin": "X4"}},
+]
+COLUMNS = frozenset({"id", "type", "amount", "flag", "note", "asset.name", "asset.isin",
+                     "asset.currency.code", "status", "not.present"})
+
+
+def test_extract_columns_matches_json_normalize():
+    extracted = extract_columns(RECORDS, COLUMNS)
+    normalized = pd.json_normalize(RECORDS)
+    # Same values and inferred dtypes as json_normalize for every column present in the data
+    pd.testing.assert_frame_equal(extracted, normalized[list(extracted.columns)])
+    # json_normalize's order for columns in the first record; columns first seen later go last
+    assert list(extracted.columns) == ["id", "type", "amount", "flag", "note", "asset.name", "asset.isin",
+                                       "asset.currency.code", "status"]
+
+
+def test_extract_columns_keeps_null_apart_from_missing():
+    note = extract_columns(RECORDS, frozenset({"note"}))["note"]
+    assert note.dtype == object
+    assert note[2] is None # null in the record
+    assert np.isnan(note[3]) # key absent
+
+
+def test_extract_columns_without_any_present_column():
+    assert extract_columns(RECORDS, frozenset({"not.present"})) is None
+
+
+def _if_chain_data_type(name):
+    """The original if/elif data type detection, which detect_data_type must agree with."""
+    if "assets" in name:
+        return "assets"
+    elif "transactions" in name:
+        return "transactions"
+    elif "positions" in name:
+        return "positions"
+    elif "portfolios" in name and "metrics" not in name:
+        return "portfolios"
+    elif "portfolio_metrics" in name:
+        return "portfolio_metrics"
+    return "unknown"
+
+
+@pytest.mark.parametrize("name", [
+    "all_assets", "sample_assets_2k", "all_transactions", "all_positions", "all_portfolios",
+    "all_portfolio_metrics", "portfolios_daily_metrics", "metrics_portfolios", "positions_assets",
+    "portfolio_metrics_transactions", "portfolios_positions", "portfolio", "report", "",
+])
+def test_detect_data_type_matches_keyword_precedence(name):
+    assert detect_data_type(name) == _if_chain_data_type(name)
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+import pytest
+
+from project_agents.dashboard_agent import agent
+
+LINT_FAILURE = '<p className="text-red-500">TSX validation failed after multiple attempts. Check backend logs.</p>'
+GRID = '<div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">\n  </div>'
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    """Replaces the tool logic with one returning `outputs` in turn, and starts from an empty cache."""
+    monkeypatch.setattr(agent, "_tsx_cache", OrderedDict())
+    calls = []
+
+    def use(*outputs):
+        def generate(research_data):
+            calls.append(research_data)
+            return outputs[len(calls) - 1]
+        monkeypatch.setattr(agent, "generate_news_display_code_func", generate)
+        return calls
+    return use
+
+
+def test_successful_tsx_is_cached(generator):
+    calls = generator(GRID)
+    assert agent.run_tsx_generation('{"relevant_news": []}') == GRID
+    assert agent.run_tsx_generation('{"relevant_news": []}') == GRID
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("failure", [LINT_FAILURE, agent._ERR_IMPORT])
+def test_error_results_are_not_cached(generator, failure):
+    calls = generator(failure, GRID)
+    assert agent.run_tsx_generation('{"relevant_news": []}') == failure
+    assert agent.run_tsx_generation('{"relevant_news": []}') == GRID
+    assert len(calls) == 2
@@ -0,0 +1,90 @@
+import random
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from project_agents.dashboard_agent import tools
+from stonk_research_agent.tools import WebSearchNewsArticle
+
+
+def _chained_replace_escape(text):
+    """The original escape_tsx: one str.replace pass per escaped character/sequence."""
+    if text is None:
+        return 'null'
+    escaped = text.replace('\\', '\\\\')
+    escaped = escaped.replace('"', '\\"')
+    escaped = escaped.replace('\n', '\\n')
+    escaped = escaped.replace('\r', '\\r')
+    escaped = escaped.replace('\t', '\\t')
+    escaped = escaped.replace('`', '\\`')
+    escaped = escaped.replace('<script', '<\\script')
+    return f'"{escaped}"'
+
+
+@pytest.mark.parametrize("text", [
+    None,
+    "",
+    "Plain headline",
+    'He said "buy" \\ sell',
+    "line one\nline two\r\n\ttabbed `code`",
+    "<script>alert(1)</script> and <scripts>",
+    "\\<script",
+    "Ünïcödé – ok",
+])
+def test_escape_tsx_matches_chained_replace(text):
+    assert tools.escape_tsx(text) == _chained_replace_escape(text)
+
+
+def test_escape_tsx_matches_chained_replace_on_random_text():
+    rng = random.Random(0)
+    pieces = ['\\', '"', '`', '\n', '\r', '\t', '<script', '<', 'script', 'a', ' ', 'é']
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert tools.escape_tsx(text) == _chained_replace_escape(text)
+
+
+@pytest.fixture
+def news_adapter(monkeypatch):
+    """The bulk news validator; built here when tools fell back to placeholders (no agents SDK)."""
+    if tools._NEWS_ADAPTER is None:
+        monkeypatch.setattr(tools, "_NEWS_ADAPTER", TypeAdapter(List[WebSearchNewsArticle]))
+
+
+def _validate_one_by_one(news_list_raw):
+    """The original per-item validation: skip non-dicts and items the model rejects."""
+    articles = []
+    for item_raw in news_list_raw:
+        if not isinstance(item_raw, dict):
+            continue
+        try:
+            articles.append(WebSearchNewsArticle(**item_raw))
+        except ValidationError:
+            pass
+    return articles
+
+
+NEWS_ITEMS = [
+    {"headline": "Valid", "source_url": "https://example.com/1", "sentiment_score": 0.5},
+    {"headline": "Bad URL", "source_url": "invalid-url"},
+    "not a dict",
+    None,
+    {"headline": "Bad score", "sentiment_score": "very good"},
+    {}, # source_url is required
+    {"source_url": "https://example.com/minimal"},
+    {"headline": "Also valid", "source_url": "https://example.com/2", "summary": "s",
+     "publish_date": "2025-01-02T12:00:00Z", "sentiment_score": -1},
+]
+
+
+def test_validate_news_items_matches_per_item_validation(news_adapter):
+    validated = tools._validate_news_items(NEWS_ITEMS)
+    expected = _validate_one_by_one(NEWS_ITEMS)
+    assert [article.model_dump() for article in validated] == [article.model_dump() for article in expected]
+    assert [article.headline for article in validated] == ["Valid", None, "Also valid"]
+
+
+def test_validate_news_items_all_valid(news_adapter):
+    items = [NEWS_ITEMS[0], NEWS_ITEMS[-1]]
+    assert [article.model_dump() for article in tools._validate_news_items(items)] == \
+        [article.model_dump() for article in _validate_one_by_one(items)]
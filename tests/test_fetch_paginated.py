@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx") # The fetch scripts import wealtharc_client, which needs it
+from scripts import fetch_paginated_portfolios, fetch_paginated_transactions
+
+# Repeated ids across (and within) pages, plus records without an id
+RECORDS = [
+    {"id": 1, "n": 0}, {"id": 2, "n": 1}, {"n": 2}, {"id": 1, "n": 3}, {"id": 3, "n": 4},
+    {"id": 2, "n": 5}, {"n": 6}, {"id": 4, "n": 7}, {"id": 4, "n": 8}, {"id": 5, "n": 9}, {"id": 1, "n": 10},
+]
+
+
+def _dedup_two_pass(records):
+    """The separate post-fetch dedup the inline version replaced."""
+    by_id, no_id = {}, []
+    for record in records:
+        if record.get('id') is None:
+            no_id.append(record)
+        else:
+            by_id.setdefault(record['id'], record)
+    return list(by_id.values()) + no_id
+
+
+def _fake_get(records, extra=0):
+    """An async client call serving `records` by skip/top; `extra` makes each page overshoot `top`."""
+    async def get(top, skip, additional_params=None):
+        await asyncio.sleep(0)
+        response = {"value": records[skip:skip + top + extra]}
+        if additional_params and additional_params.get("$count") == "true":
+            response["@odata.count"] = len(records)
+        return response
+    return get
+
+
+@pytest.fixture
+def script(monkeypatch):
+    """Small pages and fresh asyncio primitives (they bind to the first event loop that waits on them)."""
+    def configure(module, page_size=3):
+        monkeypatch.setattr(module, "PAGE_SIZE", page_size)
+        monkeypatch.setattr(module, "_inflight", asyncio.Semaphore(module.MAX_INFLIGHT))
+        if hasattr(module, "_fetched_ids_lock"):
+            monkeypatch.setattr(module, "_fetched_ids_lock", asyncio.Lock())
+        return module
+    return configure
+
+
+def test_transactions_are_deduplicated_while_pages_are_consumed(script, monkeypatch, tmp_path):
+    module = script(fetch_paginated_transactions)
+    monkeypatch.setattr(module, "FETCHED_IDS_FILE", str(tmp_path / "fetched_ids.txt"))
+    monkeypatch.setattr(module.wealtharc_client, "get_transactions", _fake_get(RECORDS))
+
+    transactions = asyncio.run(module.fetch_all_transactions_concurrently())
+
+    assert transactions == _dedup_two_pass(RECORDS)
+    assert [txn["n"] for txn in transactions] == [0, 1, 4, 7, 9, 2, 6]
+    assert (tmp_path / "fetched_ids.txt").read_text().split() == ["1", "2", "3", "4", "5"]
+
+
+def test_portfolios_are_deduplicated_while_pages_are_consumed(script, monkeypatch):
+    module = script(fetch_paginated_portfolios)
+    monkeypatch.setattr(module.wealtharc_client, "get_portfolios", _fake_get(RECORDS))
+
+    assert asyncio.run(module.fetch_all_portfolios_concurrently()) == _dedup_two_pass(RECORDS)
+
+
+def test_portfolios_past_the_fetch_limit_are_dropped_before_dedup(script, monkeypatch):
+    module = script(fetch_paginated_portfolios)
+    monkeypatch.setattr(module, "MAX_ENTRIES_TO_FETCH", 7)
+    # Pages come back larger than requested, so the limit is crossed inside a page
+    get = _fake_get(RECORDS, extra=2)
+    monkeypatch.setattr(module.wealtharc_client, "get_portfolios", get)
+
+    portfolios = asyncio.run(module.fetch_all_portfolios_concurrently())
+
+    collected = RECORDS[0:5] + RECORDS[3:8] # Pages as served: skip=0 (top 3 + 2), skip=3 (top 3 + 2)
+    assert portfolios == _dedup_two_pass(collected[:7])
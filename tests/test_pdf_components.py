@@ -0,0 +1,44 @@
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from shared.pdf_report.components import (
+    PDFDocument,
+    TextComponent,
+    TableComponent,
+    ImageComponent,
+    PageBreakComponent,
+    TextAlignment,
+)
+
+RAW_COMPONENTS = [
+    {"type": "text", "content": "Report", "style": "heading1", "alignment": "center", "space_after": 18},
+    {"type": "page_break"},
+    {"type": "table", "title": "Metrics",
+     "columns": [{"header": "Metric", "data_key": "metric"},
+                 {"header": "Value", "data_key": "value", "alignment": "right"}],
+     "data": [{"metric": "AuM", "value": "1,000"}, {"metric": "MTD", "value": "-0.5%"}]},
+    {"type": "image", "image_path": "/tmp/chart.png", "width": 200, "caption": "Chart"},
+    {"content": "No type field, defaults to text"},
+]
+
+
+def test_from_list_matches_per_model_validation():
+    document = PDFDocument.from_list(RAW_COMPONENTS)
+    assert document == PDFDocument(components=RAW_COMPONENTS)
+    assert [type(c) for c in document.components] == [
+        TextComponent, PageBreakComponent, TableComponent, ImageComponent, TextComponent]
+    assert document.components[0].alignment is TextAlignment.CENTER
+
+
+def test_from_list_rejects_invalid_components():
+    with pytest.raises(ValidationError):
+        PDFDocument.from_list([{"type": "table", "columns": "not a list", "data": []}])
+
+
+def test_to_json_bytes_round_trips():
+    document = PDFDocument.from_list(RAW_COMPONENTS)
+    data = document.to_json_bytes()
+    assert isinstance(data, bytes)
+    assert PDFDocument.model_validate_json(data) == document
+    assert orjson.loads(data) == orjson.loads(document.model_dump_json())
@@ -0,0 +1,51 @@
+import orjson
+import pytest
+
+pytest.importorskip("ijson")
+from scripts.process_asset_data import load_json_data, process_assets, save_filtered_data
+
+
+def _instrument(i):
+    return {"@odata.type": "#WealthArc.Instrument", "id": i, "isin": f"XS{i:010d}", "name": f"Bond {i}"}
+
+
+PREVIOUS_OUTPUT = orjson.dumps([{"id": 0, "isin": "OLD", "name": "Previous run"}], option=orjson.OPT_INDENT_2)
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    """An output file left behind by a previous successful run."""
+    path = tmp_path / "filtered_assets.json"
+    path.write_bytes(PREVIOUS_OUTPUT)
+    return path
+
+
+def _save(input_path, output_path):
+    return save_filtered_data(process_assets(load_json_data(str(input_path))), str(output_path))
+
+
+def test_save_filtered_data_matches_indented_dump(tmp_path, output_path):
+    assets = [_instrument(1), {"@odata.type": "#WealthArc.CashAccount", "id": 2},
+              {"@odata.type": "#WealthArc.Instrument", "id": 3, "isin": ""}, _instrument(4)]
+    input_path = tmp_path / "all_assets.json"
+    input_path.write_bytes(orjson.dumps(assets))
+
+    assert _save(input_path, output_path) == 2
+    expected = [{"id": a["id"], "isin": a["isin"], "name": a["name"]} for a in (assets[0], assets[3])]
+    assert output_path.read_bytes() == orjson.dumps(expected, option=orjson.OPT_INDENT_2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["all_assets.json", "filtered_assets.json"]
+
+
+@pytest.mark.parametrize("raw_input", [
+    # A non-object element after instruments have already been written
+    b"[" + b",".join(orjson.dumps(_instrument(i)) for i in range(3)) + b", 5, " + orjson.dumps(_instrument(4)) + b"]",
+    # Input that turns malformed part way through the array
+    b"[" + b",".join(orjson.dumps(_instrument(i)) for i in range(3)) + b", {\"id\": ]",
+])
+def test_mid_stream_failure_keeps_previous_output(tmp_path, output_path, raw_input):
+    input_path = tmp_path / "all_assets.json"
+    input_path.write_bytes(raw_input)
+
+    assert _save(input_path, output_path) is None
+    assert output_path.read_bytes() == PREVIOUS_OUTPUT
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["all_assets.json", "filtered_assets.json"]